@@ -0,0 +1,49 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Profil build startup cepat: onedir tanpa UPX.
+# Tidak ada proses unpack ke folder temp dan tidak ada dekompresi UPX saat start,
+# jadi restart service setelah crash/update langsung jalan.
+# Build: pyinstaller PopulateTimbang_onedir.spec  -> dist/PopulateTimbang/PopulateTimbang.exe
+
+
+a = Analysis(
+    ['main.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=['mysql.connector.locales.eng.client_error', 'mysql.connector.plugins'],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=['tkinter'],
+    noarchive=False,
+    optimize=0,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='PopulateTimbang',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='PopulateTimbang',
+)
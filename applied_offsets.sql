@@ -0,0 +1,79 @@
+-- Tabel offset apply di SQL Server untuk main.py (APPLY_BATCH_SIZE > 1)
+-- Setiap entri log yang diterapkan lewat batch dicatat di sini dalam transaksi yang
+-- sama dengan perubahan datanya. Jika daemon mati sebelum ack di MySQL ter-commit,
+-- entri yang sama dikenali saat restart dan hanya di-ack, tidak diterapkan ulang,
+-- walaupun isi atau urutan batch berikutnya berbeda.
+-- Key     : (WB_TAG, NOURUT1, PLANT_ID, CHANGE_SEQ) = satu versi baris log
+-- RESULT  : hasil entri (S = SUCCESS, N = NOOP)
+-- Tabel format lama (kolom BATCH_ID) tidak dipakai lagi: DROP TABLE lalu buat ulang di bawah.
+
+CREATE TABLE SYNC_APPLIED_OFFSETS (
+    WB_TAG          NVARCHAR(50)  NOT NULL,
+    NOURUT1         NVARCHAR(50)  NOT NULL,
+    PLANT_ID        NVARCHAR(50)  NOT NULL,
+    CHANGE_SEQ      INT           NOT NULL,
+    LOG_TIME        DATETIME      NULL,
+    RESULT          CHAR(1)       NOT NULL,
+    PC_NAME         NVARCHAR(100) NULL,
+    APPLIED_AT      DATETIME      NOT NULL DEFAULT GETDATE(),
+    CONSTRAINT PK_SYNC_APPLIED_OFFSETS PRIMARY KEY (WB_TAG, NOURUT1, PLANT_ID, CHANGE_SEQ)
+);
+
+CREATE INDEX IX_SYNC_APPLIED_OFFSETS_APPLIED_AT ON SYNC_APPLIED_OFFSETS (APPLIED_AT);
+
+-- Entri terakhir per station:
+-- SELECT TOP 20 * FROM SYNC_APPLIED_OFFSETS WHERE WB_TAG = 'WB01' ORDER BY APPLIED_AT DESC;
+
+-- Baris lama dibersihkan otomatis oleh daemon (OFFSET_RETENTION_DAYS, default 7 hari).
+
+
+-- ===== MySQL =====
+-- CHANGE_SEQ : nomor perubahan per (NOURUT1, PLANT_ID), naik setiap kali trigger menulis log.
+-- LOG_TIME hanya presisi detik; tanpa CHANGE_SEQ, edit ulang di detik yang sama tidak bisa
+-- dibedakan dan bisa di-ack tanpa diterapkan. Tanpa kolom ini apply tetap per baris.
+-- Untuk trigger row image, generate ulang dengan: python row_image.py (tanpa row image: --no-image)
+-- Jika retry_queue.sql juga dipakai, generate dengan python row_image.py (ikut reset RETRY_COUNT/NEXT_RETRY_AT).
+
+ALTER TABLE tb_timbang2_log ADD COLUMN CHANGE_SEQ INT NOT NULL DEFAULT 0;
+
+
+DROP TRIGGER IF EXISTS tb_timbang2_after_insert;
+
+CREATE TRIGGER tb_timbang2_after_insert
+AFTER INSERT ON tb_timbang2
+FOR EACH ROW
+BEGIN
+    DECLARE seq INT;
+    SELECT COALESCE(MAX(CHANGE_SEQ), 0) + 1 INTO seq FROM tb_timbang2_log WHERE NOURUT1 = NEW.NOURUT1 AND PLANT_ID = NEW.PLANT_ID;
+    INSERT INTO tb_timbang2_log (NOURUT1, PLANT_ID, AKSI, LOG_TIME, CHANGE_SEQ)
+    VALUES (NEW.NOURUT1, NEW.PLANT_ID, 'INSERT', NOW(), seq)
+    ON DUPLICATE KEY UPDATE AKSI='INSERT', LOG_TIME=NOW(), STATUS='PENDING', CHANGE_SEQ=VALUES(CHANGE_SEQ);
+END
+
+
+DROP TRIGGER IF EXISTS tb_timbang2_after_update;
+
+CREATE TRIGGER tb_timbang2_after_update
+AFTER UPDATE ON tb_timbang2
+FOR EACH ROW
+BEGIN
+    DECLARE seq INT;
+    SELECT COALESCE(MAX(CHANGE_SEQ), 0) + 1 INTO seq FROM tb_timbang2_log WHERE NOURUT1 = NEW.NOURUT1 AND PLANT_ID = NEW.PLANT_ID;
+    INSERT INTO tb_timbang2_log (NOURUT1, PLANT_ID, AKSI, LOG_TIME, CHANGE_SEQ)
+    VALUES (NEW.NOURUT1, NEW.PLANT_ID, 'UPDATE', NOW(), seq)
+    ON DUPLICATE KEY UPDATE AKSI='UPDATE', LOG_TIME=NOW(), STATUS='PENDING', CHANGE_SEQ=VALUES(CHANGE_SEQ);
+END
+
+
+DROP TRIGGER IF EXISTS tb_timbang2_after_delete;
+
+CREATE TRIGGER tb_timbang2_after_delete
+AFTER DELETE ON tb_timbang2
+FOR EACH ROW
+BEGIN
+    DECLARE seq INT;
+    SELECT COALESCE(MAX(CHANGE_SEQ), 0) + 1 INTO seq FROM tb_timbang2_log WHERE NOURUT1 = OLD.NOURUT1 AND PLANT_ID = OLD.PLANT_ID;
+    INSERT INTO tb_timbang2_log (NOURUT1, PLANT_ID, AKSI, LOG_TIME, CHANGE_SEQ)
+    VALUES (OLD.NOURUT1, OLD.PLANT_ID, 'DELETE', NOW(), seq)
+    ON DUPLICATE KEY UPDATE AKSI='DELETE', LOG_TIME=NOW(), STATUS='PENDING', CHANGE_SEQ=VALUES(CHANGE_SEQ);
+END
@@ -0,0 +1,182 @@
+import csv
+import datetime
+import decimal
+import os
+import uuid
+
+BULK_STAGE_TABLE = "#bulk_stage"
+BULK_SAVEPOINT = "bulk_chunk"
+
+SQL_DATETIME_MS = ("datetime", "smalldatetime")
+SQL_DECIMAL = ("decimal", "numeric", "money", "smallmoney")
+SQL_BINARY = ("binary", "varbinary", "image", "timestamp", "rowversion")
+
+
+class BulkValueError(Exception):
+    """Nilai yang tidak bisa ditulis ke file BULK INSERT tanpa mengubah hasil."""
+
+
+class BulkTransactionLost(Exception):
+    """BULK INSERT gagal dan transaksi pemanggil ikut dibatalkan SQL Server."""
+
+
+def format_bulk_value(value, sql_type):
+    """Ubah nilai Python ke teks CSV yang dibaca SQL Server sama seperti parameter pyodbc."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, datetime.datetime):
+        if sql_type in SQL_DATETIME_MS:
+            # pyodbc juga memotong ke milidetik untuk kolom DATETIME
+            return value.isoformat(timespec="milliseconds")
+        return value.isoformat(timespec="microseconds")
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return format(value, "f")
+    if isinstance(value, float):
+        if sql_type in SQL_DECIMAL:
+            return format(decimal.Decimal(repr(value)), "f")
+        return repr(value)
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        if sql_type not in SQL_BINARY:
+            raise BulkValueError(f"bytes untuk kolom {sql_type}")
+        return value.hex()
+    if isinstance(value, str):
+        # CSV tidak bisa membedakan string kosong dengan NULL (KEEPNULLS)
+        if value == "":
+            raise BulkValueError("string kosong")
+        return value
+    raise BulkValueError(f"tipe {type(value).__name__} tidak didukung")
+
+
+class BulkLoader:
+    """Memuat chunk baris ke SQL Server lewat file CSV + BULK INSERT.
+
+    share_dir adalah folder tempat file ditulis oleh program ini,
+    server_dir adalah path folder yang sama dilihat dari SQL Server
+    (misal share UNC). Jika bulk tidak bisa dipakai, load() mengembalikan
+    False dan pemanggil memakai executemany seperti biasa.
+    """
+
+    def __init__(self, sqlsrv_conn, table, share_dir, server_dir=None, tablock=True):
+        self.conn = sqlsrv_conn
+        self.table = table
+        self.share_dir = share_dir
+        self.server_dir = server_dir or share_dir
+        self.tablock = tablock
+        self.enabled = bool(share_dir) and os.path.isdir(share_dir)
+        self.table_columns = None
+        self.rows_bulk = 0
+        self.rows_fallback = 0
+
+        if not share_dir:
+            print("⚠️ BULK_SHARE_DIR tidak diset, memakai executemany.")
+        elif not self.enabled:
+            print(f"⚠️ Folder bulk {share_dir} tidak ditemukan, memakai executemany.")
+
+    def _load_table_columns(self):
+        cur = self.conn.cursor()
+        try:
+            cur.execute(
+                "SELECT c.name, t.name FROM sys.columns c "
+                "JOIN sys.types t ON c.user_type_id = t.user_type_id "
+                "WHERE c.object_id = OBJECT_ID(?) ORDER BY c.column_id",
+                (self.table,)
+            )
+            self.table_columns = [(name, type_name.lower()) for name, type_name in cur.fetchall()]
+        finally:
+            cur.close()
+
+    def _write_file(self, col_names, params_list):
+        types_by_name = {name.lower(): type_name for name, type_name in self.table_columns}
+        col_types = [types_by_name.get(c.lower()) for c in col_names]
+
+        file_name = f"bulk_{uuid.uuid4().hex}.csv"
+        local_path = os.path.join(self.share_dir, file_name)
+        try:
+            with open(local_path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f, lineterminator="\n")
+                for params in params_list:
+                    writer.writerow([format_bulk_value(v, t) for v, t in zip(params, col_types)])
+        except BulkValueError:
+            # file setengah jadi jangan tertinggal di share
+            os.remove(local_path)
+            raise
+        return local_path, os.path.join(self.server_dir, file_name)
+
+    def _rollback_chunk(self, cur, error):
+        """Batalkan chunk yang gagal ke savepoint; jika transaksi sudah hilang, hentikan load."""
+        try:
+            cur.execute("SELECT XACT_STATE()")
+            state = cur.fetchone()[0]
+        except Exception:
+            state = None
+        if state != 1:
+            raise BulkTransactionLost(f"transaksi dibatalkan SQL Server setelah BULK INSERT gagal: {error}") from error
+        cur.execute(f"ROLLBACK TRANSACTION {BULK_SAVEPOINT}")
+        cur.execute(f"IF OBJECT_ID('tempdb..{BULK_STAGE_TABLE}') IS NOT NULL DROP TABLE {BULK_STAGE_TABLE}")
+
+    def load(self, col_names, params_list) -> bool:
+        if not self.enabled or not params_list:
+            return False
+
+        if self.table_columns is None:
+            self._load_table_columns()
+
+        try:
+            local_path, server_path = self._write_file(col_names, params_list)
+        except BulkValueError as e:
+            print(f"⚠️ Chunk tidak bisa dimuat via BULK INSERT ({e}), memakai executemany.")
+            self.rows_fallback += len(params_list)
+            return False
+
+        table_order = [name.lower() for name, _ in self.table_columns]
+        direct = table_order == [c.lower() for c in col_names]
+        col_list_sql = ", ".join(f"[{c}]" for c in col_names)
+        tablock_opt = ", TABLOCK" if self.tablock else ""
+        tablock_hint = " WITH (TABLOCK)" if self.tablock else ""
+        # MAXERRORS = 0 + cek rowcount di bawah: tidak ada baris yang boleh dilewati diam-diam
+        bulk_opts = (
+            "FORMAT = 'CSV', FIELDQUOTE = '\"', FIELDTERMINATOR = ',', "
+            f"ROWTERMINATOR = '0x0a', CODEPAGE = '65001', KEEPNULLS, MAXERRORS = 0{tablock_opt}"
+        )
+        server_path_sql = server_path.replace("'", "''")
+
+        cur = self.conn.cursor()
+        try:
+            # savepoint supaya chunk yang gagal bisa dibatalkan tanpa membuang chunk sebelumnya
+            cur.execute(f"IF @@TRANCOUNT = 0 BEGIN TRANSACTION; SAVE TRANSACTION {BULK_SAVEPOINT}")
+            if direct:
+                # urutan kolom file sama dengan tabel: langsung ke tabel tujuan
+                cur.execute(f"BULK INSERT {self.table} FROM '{server_path_sql}' WITH ({bulk_opts})")
+                loaded = cur.rowcount
+            else:
+                cur.execute(f"SELECT TOP 0 {col_list_sql} INTO {BULK_STAGE_TABLE} FROM {self.table}")
+                cur.execute(f"BULK INSERT {BULK_STAGE_TABLE} FROM '{server_path_sql}' WITH ({bulk_opts})")
+                cur.execute(
+                    f"INSERT INTO {self.table}{tablock_hint} ({col_list_sql}) "
+                    f"SELECT {col_list_sql} FROM {BULK_STAGE_TABLE}"
+                )
+                loaded = cur.rowcount
+                cur.execute(f"DROP TABLE {BULK_STAGE_TABLE}")
+            if loaded != len(params_list):
+                raise RuntimeError(f"{loaded} dari {len(params_list)} baris termuat")
+        except Exception as e:
+            self.enabled = False
+            self.rows_fallback += len(params_list)
+            self._rollback_chunk(cur, e)
+            print(f"⚠️ BULK INSERT gagal ({e}), kembali ke executemany.")
+            return False
+        finally:
+            cur.close()
+            try:
+                os.remove(local_path)
+            except OSError:
+                pass
+
+        self.rows_bulk += len(params_list)
+        return True
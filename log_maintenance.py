@@ -0,0 +1,172 @@
+import argparse
+import os
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MYSQL_CONN = {
+    'host': os.getenv("MYSQL_HOST"),
+    'user': os.getenv("MYSQL_USER"),
+    'password': os.getenv("MYSQL_PASS"),
+    'database': os.getenv("MYSQL_DB")
+}
+
+MYSQL_LOG = os.getenv("MYSQL_TABLE_LOG")
+
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", 30))
+LOG_COMPACT_CHUNK = int(os.getenv("LOG_COMPACT_CHUNK", 500))
+LOG_COMPACT_PAUSE = float(os.getenv("LOG_COMPACT_PAUSE", 0.5))
+LOG_ARCHIVE_TABLE = os.getenv("LOG_ARCHIVE_TABLE") or None
+
+# query poll yang dipakai main.py, untuk mengukur biayanya
+POLL_QUERIES = {
+    "sync_data_timbang": "SELECT NOURUT1, AKSI, PLANT_ID FROM {table} WHERE STATUS = 'PENDING' ORDER BY log_time",
+    "sync_data_timbang_log": "SELECT NOURUT1, PLANT_ID, AKSI, COUNTER_DONE, PC_NAME, STATUS, MESSAGE, LOG_TIME FROM {table} WHERE (SYNC_STATUS IS NULL OR SYNC_STATUS != 'SENT') ORDER BY LOG_TIME ASC LIMIT 100",
+}
+
+
+def report_log_table(mysql_conn, table):
+    """Ukuran tabel log, jumlah per STATUS dan waktu eksekusi query poll."""
+    cur = mysql_conn.cursor(dictionary=True)
+    try:
+        cur.execute(
+            "SELECT TABLE_ROWS, DATA_LENGTH, INDEX_LENGTH FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,)
+        )
+        info = cur.fetchone() or {}
+
+        cur.execute(f"SELECT STATUS, SYNC_STATUS, COUNT(*) AS jumlah FROM {table} GROUP BY STATUS, SYNC_STATUS")
+        per_status = cur.fetchall()
+
+        poll = {}
+        for name, query in POLL_QUERIES.items():
+            start = time.perf_counter()
+            cur.execute(query.format(table=table))
+            rows = cur.fetchall()
+            poll[name] = {"ms": round((time.perf_counter() - start) * 1000, 1), "rows": len(rows)}
+
+        mysql_conn.commit()
+    finally:
+        cur.close()
+
+    report = {
+        "table_rows": info.get("TABLE_ROWS"),
+        "data_mb": round((info.get("DATA_LENGTH") or 0) / 1048576, 2),
+        "index_mb": round((info.get("INDEX_LENGTH") or 0) / 1048576, 2),
+        "per_status": per_status,
+        "poll": poll,
+    }
+    return report
+
+
+def print_report(report, title):
+    print(f"=== {title} ===")
+    print(f"  Baris (perkiraan): {report['table_rows']}, data: {report['data_mb']} MB, index: {report['index_mb']} MB")
+    for r in report["per_status"]:
+        print(f"  STATUS={r['STATUS']} SYNC_STATUS={r['SYNC_STATUS']}: {r['jumlah']}")
+    for name, p in report["poll"].items():
+        print(f"  Poll {name}: {p['ms']} ms ({p['rows']} baris)")
+
+
+def compact_log(mysql_conn, table, retention_days, chunk_size=LOG_COMPACT_CHUNK, pause=LOG_COMPACT_PAUSE,
+                archive_table=None, max_chunks=None):
+    """Hapus (atau arsipkan lalu hapus) log SUCCESS + SENT yang lebih tua dari retention_days.
+
+    Diproses per chunk kecil dengan commit dan jeda di antaranya supaya
+    trigger di tb_timbang2 tidak tertahan lock terlalu lama. Baris yang
+    diubah trigger di tengah jalan (LOG_TIME/STATUS berubah) tidak ikut terhapus.
+    Baris terakhir (COUNTER_DONE tertinggi) setiap key selalu disimpan agar
+    counter per key tetap naik dan tidak berulang di log SQL Server.
+    """
+    cur = mysql_conn.cursor()
+    total = 0
+    skipped = 0
+    chunks = 0
+    last = None
+    try:
+        if archive_table:
+            cur.execute(f"CREATE TABLE IF NOT EXISTS {archive_table} LIKE {table}")
+            mysql_conn.commit()
+
+        while max_chunks is None or chunks < max_chunks:
+            # keyset: baris yang tidak bisa diarsipkan tetap di tabel dan tidak dipilih ulang
+            after = "AND (t.LOG_TIME, t.NOURUT1, t.PLANT_ID) > (%s, %s, %s) " if last else ""
+            # baris dengan COUNTER_DONE tertinggi per key tidak dibuang supaya max+1 tidak mulai dari awal
+            cur.execute(
+                f"SELECT t.NOURUT1, t.PLANT_ID, t.LOG_TIME FROM {table} t "
+                f"WHERE t.STATUS = 'SUCCESS' AND t.SYNC_STATUS = 'SENT' AND t.LOG_TIME < NOW() - INTERVAL %s DAY {after}"
+                f"AND t.COUNTER_DONE < (SELECT MAX(m.COUNTER_DONE) FROM {table} m WHERE m.NOURUT1 = t.NOURUT1 AND m.PLANT_ID = t.PLANT_ID) "
+                f"ORDER BY t.LOG_TIME, t.NOURUT1, t.PLANT_ID LIMIT %s",
+                (retention_days,) + ((last[2], last[0], last[1]) if last else ()) + (chunk_size,)
+            )
+            keys = cur.fetchall()
+            if not keys:
+                mysql_conn.commit()
+                break
+            last = keys[-1]
+
+            guard = "t.NOURUT1 = %s AND t.PLANT_ID = %s AND t.LOG_TIME = %s AND t.STATUS = 'SUCCESS' AND t.SYNC_STATUS = 'SENT'"
+            if archive_table:
+                # key arsip bisa bentrok (COUNTER_DONE mulai lagi setelah baris lama dibuang):
+                # hanya baris yang benar-benar masuk arsip yang dihapus
+                cur.executemany(f"INSERT IGNORE INTO {archive_table} SELECT t.* FROM {table} t WHERE {guard}", keys)
+                cur.executemany(
+                    f"DELETE t FROM {table} t JOIN {archive_table} a "
+                    f"ON a.NOURUT1 = t.NOURUT1 AND a.PLANT_ID = t.PLANT_ID AND a.LOG_TIME = t.LOG_TIME AND a.COUNTER_DONE = t.COUNTER_DONE "
+                    f"WHERE {guard}",
+                    keys
+                )
+            else:
+                cur.executemany(f"DELETE t FROM {table} t WHERE {guard}", keys)
+            deleted = max(cur.rowcount, 0)
+            mysql_conn.commit()
+
+            total += deleted
+            if archive_table:
+                skipped += len(keys) - deleted
+            chunks += 1
+            if len(keys) < chunk_size:
+                break
+            time.sleep(pause)
+    finally:
+        cur.close()
+
+    if skipped:
+        print(f"⚠️ {skipped} baris log tidak dihapus: key-nya sudah ada di {archive_table} dengan isi berbeda (atau berubah di tengah jalan).")
+    return total
+
+
+# Partisi per LOG_TIME sengaja tidak di-generate. MySQL mewajibkan kolom partisi
+# ada di setiap unique key, sedangkan trigger bergantung pada ON DUPLICATE KEY
+# atas key yang sekarang (baris PENDING COUNTER_DONE = 0 per NOURUT1/PLANT_ID) dan
+# ack memakai COUNTER_DONE = max+1. Menambah LOG_TIME ke key membuat setiap edit
+# menjadi baris baru. Jika tetap diperlukan, langkah manualnya:
+#   1. ubah trigger agar tidak bergantung pada ON DUPLICATE KEY (UPDATE baris
+#      PENDING dulu, INSERT jika tidak ada) dan sesuaikan ack di main.py;
+#   2. tambahkan LOG_TIME ke primary key tanpa membuang kolom key yang ada;
+#   3. PARTITION BY RANGE (TO_DAYS(LOG_TIME)) untuk kolom DATETIME, atau
+#      RANGE (UNIX_TIMESTAMP(LOG_TIME)) jika LOG_TIME bertipe TIMESTAMP.
+# Sampai itu dilakukan, retensi memakai compact_log di atas.
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Retensi & kompaksi tabel log {MYSQL_LOG}")
+    parser.add_argument("command", choices=["report", "compact"])
+    parser.add_argument("--days", type=int, default=LOG_RETENTION_DAYS, help="Retensi (hari) untuk compact")
+    parser.add_argument("--archive", default=LOG_ARCHIVE_TABLE, help="Tabel arsip; kosong = hapus saja")
+    args = parser.parse_args()
+
+    import mysql.connector
+    conn = mysql.connector.connect(**MYSQL_CONN)
+    try:
+        print_report(report_log_table(conn, MYSQL_LOG), "Sebelum")
+        if args.command == "compact":
+            start = time.time()
+            total = compact_log(conn, MYSQL_LOG, args.days, archive_table=args.archive)
+            aksi = f"diarsipkan ke {args.archive}" if args.archive else "dihapus"
+            print(f"{total} baris log lebih tua dari {args.days} hari {aksi} ({round(time.time() - start)}s)")
+            print_report(report_log_table(conn, MYSQL_LOG), "Sesudah")
+    finally:
+        conn.close()
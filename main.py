@@ -1,15 +1,22 @@
+import time
+STARTUP_T0 = time.perf_counter()
+STARTUP_WALL_T0 = time.time()
+
 import os
 from dotenv import load_dotenv
 import logging
 import sys
 import re
-import requests
 import threading
-import time
 import datetime
-import mysql.connector
-import pyodbc
-from mysql.connector.locales.eng import client_error
+import queue
+import zlib
+from collections import OrderedDict
+from transform import get_shift_date
+from offsets import OFFSET_LOOKUP_CHUNK, applied_lookup_sql, applied_lookup_params, split_applied, offset_rows
+from log_maintenance import compact_log
+from row_image import load_column_types, decode_row_image
+from profiling import SyncProfiler, install_signal_trigger, start_control_server
 
 load_dotenv()
 
@@ -61,44 +68,231 @@ MYSQL_TABLE = os.getenv("MYSQL_TABLE")
 SQLSRV_TABLE = os.getenv("SQLSERVER_TABLE")
 WB_TAG = os.getenv("WB_TAG", "DEFAULT_WB")
 SYNC_INTERVAL = int(os.getenv("SYNC_INTERVAL", 20))
+HEARTBEAT_INTERVAL = int(os.getenv("HEARTBEAT_INTERVAL", 20))
 
 PC_NAME = os.getenv("PC_NAME")
 
+# === Retry entri gagal (butuh kolom dari retry_queue.sql) ===
+RETRY_ENABLED = os.getenv("RETRY_ENABLED", "0") == "1"
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", 5))
+RETRY_BASE_DELAY = int(os.getenv("RETRY_BASE_DELAY", 60))
+RETRY_MAX_DELAY = int(os.getenv("RETRY_MAX_DELAY", 3600))
+RETRY_BATCH = int(os.getenv("RETRY_BATCH", 20))
+
+# === Apply paralel per key (1 = satu loop seperti biasa) ===
+APPLY_WORKERS = max(1, int(os.getenv("APPLY_WORKERS", 1)))
+
+# === Apply per batch + offset di SQL Server (butuh applied_offsets.sql; 1 = commit per baris) ===
+APPLY_BATCH_SIZE = max(1, int(os.getenv("APPLY_BATCH_SIZE", 1)))
+SQLSRV_OFFSET_TABLE = os.getenv("SQLSERVER_TABLE_OFFSET", "SYNC_APPLIED_OFFSETS")
+OFFSET_RETENTION_DAYS = int(os.getenv("OFFSET_RETENTION_DAYS", 7))
+OFFSET_TABLE_READY = None
+LOG_CHANGE_SEQ_READY = None
+LAST_OFFSET_PRUNE = None
+
+# === Retensi tabel log (0 = nonaktif) ===
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", 0))
+LOG_MAINTENANCE_INTERVAL = int(os.getenv("LOG_MAINTENANCE_INTERVAL", 3600))
+LOG_COMPACT_MAX_CHUNKS = int(os.getenv("LOG_COMPACT_MAX_CHUNKS", 20))
+LOG_ARCHIVE_TABLE = os.getenv("LOG_ARCHIVE_TABLE") or None
+LAST_LOG_MAINTENANCE = None
+
+# === Apply dari row image trigger (butuh row_image_trigger.sql) ===
+APPLY_FROM_ROW_IMAGE = os.getenv("APPLY_FROM_ROW_IMAGE", "0") == "1"
+ROW_IMAGE_COLUMNS = None
+# row image tidak dibutuhkan lagi setelah entri selesai; dibuang di ack supaya log tidak membengkak
+ROW_IMAGE_CLEAR = ", ROW_IMAGE = NULL" if APPLY_FROM_ROW_IMAGE else ""
+
+TARGET_INDEX_CHECK = os.getenv("TARGET_INDEX_CHECK", "0") == "1"
+CREATE_TARGET_INDEX = "--create-target-index" in sys.argv
+
+# === Profiling on-demand ===
+PROFILE_CYCLES = int(os.getenv("PROFILE_CYCLES", 0))
+PROFILE_SIGNAL_CYCLES = int(os.getenv("PROFILE_SIGNAL_CYCLES", 3))
+PROFILE_CONTROL_PORT = int(os.getenv("PROFILE_CONTROL_PORT", 0))
+PROFILER = SyncProfiler(LOG_DIR)
+
+# === Startup ===
+STARTUP_BUDGET_MS = int(os.getenv("STARTUP_BUDGET_MS", 2000))
+FIRST_POLL_DONE = False
+IMPORT_REPORT = os.getenv("IMPORT_REPORT", "0") == "1" or "--import-report" in sys.argv
+# modul berat yang di-import saat pertama dipakai, bukan saat startup
+HEAVY_MODULES = ("mysql.connector", "pyodbc", "requests")
+
+DRY_RUN = os.getenv("DRY_RUN", "0") == "1" or "--dry-run" in sys.argv
+DRY_RUN_BATCH_SIZES = [int(x) for x in os.getenv("DRY_RUN_BATCH_SIZES", "1,50,200,1000").split(",") if x.strip()]
+
 LAST_MAIN_ERROR_NORMALIZED = None
 LAST_STATUS_LOG = None
 LAST_SYNC_STATUS_LOG = None
 LAST_HEARTBEAT_ERROR_NORMALIZED = None
-LAST_LOGGED_SYNC = set()
-LAST_LOGGED_ERROR_PROCESSING = set()
+DEDUP_MAX_ENTRIES = int(os.getenv("DEDUP_MAX_ENTRIES", 5000))
+DEDUP_TTL = int(os.getenv("DEDUP_TTL", 3600))
+
+
+class DedupCache:
+    """Cache dedup pesan log yang dibatasi jumlah entri dan umur (detik).
+
+    Umur dihitung sejak key pertama dicatat, bukan sejak terakhir dilihat:
+    pesan yang terus berulang dicetak/ditulis lagi sekali setiap TTL. Urutan
+    entri = urutan dicatat (hit tidak mengubah posisi), jadi entri di depan
+    selalu yang paling tua: yang kedaluwarsa dibuang dulu, lalu yang tertua
+    jika melebihi kapasitas.
+    """
+
+    def __init__(self, max_entries=DEDUP_MAX_ENTRIES, ttl=DEDUP_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def seen(self, key) -> bool:
+        """True jika key masih tercatat; jika belum, key dicatat dan return False."""
+        now = time.monotonic()
+        with self.lock:
+            added_at = self.entries.get(key)
+            if added_at is not None and now - added_at < self.ttl:
+                self.hits += 1
+                return True
+
+            self.misses += 1
+            self.entries[key] = now
+            self.entries.move_to_end(key)
+            self._evict(now)
+            return False
+
+    def _evict(self, now):
+        # entri tertua (paling dulu dicatat) ada di depan; buang yang kedaluwarsa lalu yang melebihi kapasitas
+        while self.entries:
+            key, added_at = next(iter(self.entries.items()))
+            if now - added_at < self.ttl and len(self.entries) <= self.max_entries:
+                break
+            del self.entries[key]
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+LAST_LOGGED_SYNC = DedupCache()
+LAST_LOGGED_ERROR_PROCESSING = DedupCache()
+
+# === Regex normalisasi (dikompilasi sekali) ===
+RE_MEM_ADDR = re.compile(r"0x[0-9A-Fa-f]+")
+RE_MEM_ADDR_LOWER = re.compile(r"0x[0-9a-f]+")
+RE_WHITESPACE = re.compile(r"\s+")
+RE_HTTPS_POOL_HOST = re.compile(r"httpsconnectionpool\(host='[^']*'\)")
+RE_TIMEOUT = re.compile(r"timeout=[0-9]+")
+RE_ERROR_POPULATE = re.compile(r"\s*\|\s*\[Error Populate Data\].*")
+RE_ERROR_SYNC_LOG = re.compile(r"\s*\|\s*\[Error Sync to Log SqlServer\].*")
 
 def normalize_error_exception_utama(err_text: str) -> str:
-    err_text = re.sub(r'0x[0-9A-Fa-f]+', '0xADDR', err_text)
-    err_text = re.sub(r'\s+', ' ', err_text.strip())
+    err_text = RE_MEM_ADDR.sub('0xADDR', err_text)
+    err_text = RE_WHITESPACE.sub(' ', err_text.strip())
     return err_text
 
 def normalize_error(err_text: str) -> str:
     err = err_text.lower()
-    err = re.sub(r"0x[0-9a-f]+", "0xADDR", err)  # hilangkan alamat memori
-    err = re.sub(r"\s+", " ", err)               # normalisasi spasi
-    err = re.sub(r"httpsconnectionpool\(host='[^']*'\)", "httpsconnectionpool(host='X')", err)
-    err = re.sub(r"timeout=[0-9]+", "timeout=X", err)
+    err = RE_MEM_ADDR_LOWER.sub("0xADDR", err)  # hilangkan alamat memori
+    err = RE_WHITESPACE.sub(" ", err)               # normalisasi spasi
+    err = RE_HTTPS_POOL_HOST.sub("httpsconnectionpool(host='X')", err)
+    err = RE_TIMEOUT.sub("timeout=X", err)
     return err.strip()
 
 def normalize_error_already_sync(msg: str) -> str:
     msg = msg.strip().lower()
-    msg = re.sub(r"0x[0-9a-f]+", "0xADDR", msg)   # hapus alamat memori
-    msg = re.sub(r"\s+", " ", msg)
+    msg = RE_MEM_ADDR_LOWER.sub("0xADDR", msg)   # hapus alamat memori
+    msg = RE_WHITESPACE.sub(" ", msg)
     return msg
 
+# === Statistik sinkronisasi (dikirim bersama heartbeat) ===
+class SyncStats:
+    """Agregasi ringan di memori dari loop sync; aman dipakai dari worker thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.pending = 0
+        self.last_log_time = None
+        self.applied = 0
+        self.failed = 0
+        self.errors = 0
+        self.main_errors = 0
+        self.rows_per_sec = 0.0
+        self.cycle_start = None
+        self.cycle_applied = 0
+
+    def begin_cycle(self, pending):
+        with self.lock:
+            self.pending = pending
+            self.cycle_start = time.monotonic()
+            self.cycle_applied = 0
+
+    def record(self, entry, result, pending=True):
+        with self.lock:
+            if result in ("SUCCESS", "NOOP"):
+                self.applied += 1
+                self.cycle_applied += 1
+                if pending:
+                    self.pending = max(self.pending - 1, 0)
+                log_time = entry.get('LOG_TIME')
+                if log_time is not None and (self.last_log_time is None or log_time > self.last_log_time):
+                    self.last_log_time = log_time
+            elif result == "FAILED":
+                self.failed += 1
+            else:
+                self.errors += 1
+
+    def end_cycle(self):
+        with self.lock:
+            if self.cycle_start is not None and self.cycle_applied:
+                elapsed = time.monotonic() - self.cycle_start
+                self.rows_per_sec = round(self.cycle_applied / elapsed, 2) if elapsed > 0 else 0.0
+            self.cycle_start = None
+
+    def record_main_error(self):
+        with self.lock:
+            self.main_errors += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "pending": self.pending,
+                "last_log_time": self.last_log_time.isoformat() if self.last_log_time else None,
+                "rows_per_sec": self.rows_per_sec,
+                "applied": self.applied,
+                "failed": self.failed,
+                "errors": self.errors,
+                "main_errors": self.main_errors,
+                "uptime_s": int(time.monotonic() - self.started),
+            }
+
+
+SYNC_STATS = SyncStats()
+
 def send_heartbeat(pc_name):
     heartbeat_ip = os.getenv("MONITORING_IP")
     heartbeat_url = f"{heartbeat_ip}/api/heartbeat"
     
     global LAST_HEARTBEAT_ERROR_NORMALIZED
+
+    # import di thread heartbeat supaya tidak memperlambat startup
+    import requests
+
+    # satu session keep-alive untuk semua heartbeat
+    session = requests.Session()
     
     while True:
         try:
-            requests.post(heartbeat_url, json={"pc_name": pc_name}, timeout=3)
+            session.post(heartbeat_url, json={"pc_name": pc_name, "stats": SYNC_STATS.snapshot()}, timeout=3)
             
             if LAST_HEARTBEAT_ERROR_NORMALIZED is not None:
                 LAST_HEARTBEAT_ERROR_NORMALIZED = None
@@ -110,248 +304,742 @@ def send_heartbeat(pc_name):
             if norm_err != LAST_HEARTBEAT_ERROR_NORMALIZED:
                 print(f"Gagal kirim heartbeat: {raw_err}")
                 LAST_HEARTBEAT_ERROR_NORMALIZED = norm_err
-        time.sleep(20)
-        
-# === Fungsi bantu ===
-def get_shift_date(dt):
-    """Mengembalikan tanggal shift berdasarkan jam kerja."""
-    if not dt:
-        return None
-    try:
-        trim_date = dt.date()
-        trim_time = dt.time()
-        if datetime.time(7, 0, 0) <= trim_time <= datetime.time(18, 59, 59):
-            return datetime.datetime.combine(trim_date, datetime.time(0, 0, 1))
-        elif datetime.time(19, 0, 0) <= trim_time <= datetime.time(23, 59, 59):
-            return datetime.datetime.combine(trim_date, datetime.time(0, 0, 2))
-        else:
-            return datetime.datetime.combine(trim_date - datetime.timedelta(days=1), datetime.time(0, 0, 2))
-    except Exception as e:
-        print("Error get_shift_date:", e)
-        return None
+        time.sleep(HEARTBEAT_INTERVAL)
 
-
-def sync_data_timbang():
-    # --- koneksi ke SQL Server ---
-    sqlsrv_conn = pyodbc.connect(
+# === Fungsi bantu ===
+def connect_sqlserver():
+    import pyodbc
+    return pyodbc.connect(
         f"DRIVER={{ODBC Driver 17 for SQL Server}};"
         f"SERVER={SQLSERVER_CONN['server']};"
         f"DATABASE={SQLSERVER_CONN['database']};"
         f"UID={SQLSERVER_CONN['username']};"
         f"PWD={SQLSERVER_CONN['password']}"
     )
-    sqlsrv_cur = sqlsrv_conn.cursor()
 
-    # --- koneksi ke MySQL ---
-    mysql_conn = mysql.connector.connect(**MYSQL_CONN)
-    mysql_cur = mysql_conn.cursor(dictionary=True)
-    
+def connect_mysql():
+    import mysql.connector
+    from mysql.connector.locales.eng import client_error
+    return mysql.connector.connect(**MYSQL_CONN)
+
+class ConnectionPool:
+    """Pool koneksi sederhana agar worker apply tidak connect ulang tiap siklus."""
+
+    def __init__(self, factory, size):
+        self.factory = factory
+        self.idle = queue.LifoQueue(maxsize=size)
+
+    def acquire(self):
+        # koneksi idle bisa sudah diputus server di antara siklus: cek dulu sebelum dipakai
+        while True:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                return self.factory()
+            if self.ping(conn):
+                return conn
+            self.discard(conn)
+
+    def ping(self, conn):
+        try:
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT 1")
+                cur.fetchall()
+            finally:
+                cur.close()
+            return True
+        except:
+            return False
+
+    def release(self, conn):
+        try:
+            self.idle.put_nowait(conn)
+        except queue.Full:
+            self.discard(conn)
+
+    def discard(self, conn):
+        try:
+            conn.close()
+        except:
+            pass
+
+SQLSERVER_POOL = ConnectionPool(connect_sqlserver, APPLY_WORKERS)
+MYSQL_POOL = ConnectionPool(connect_mysql, APPLY_WORKERS)
+
+def add_derived_columns(row):
+    """Tambahkan kolom buatan (TANGGAL_SHIFT, DATE_SYNC, WB_TAG, DELETED) ke row MySQL."""
+    row["TANGGAL_SHIFT"] = get_shift_date(row.get("TANGGAL2"))
+    row["DATE_SYNC"] = datetime.datetime.now()
+    row["WB_TAG"] = WB_TAG
+    row["DELETED"] = 0
+    return row
+
+# kolom yang tidak dibandingkan saat cek perubahan (PK & manual field)
+SKIP_FIELDS = ('NOURUT1', 'PLANT_ID', 'DATE_SYNC')
+
+def find_changed_columns(row, old_row, old_index, col_names):
+    """Kolom yang berubah; old_row dibaca per posisi lewat old_index (tanpa dict per baris)."""
+    return [
+        c for c in col_names
+        if c not in SKIP_FIELDS and str(row[c]) != str(old_row[old_index[c]])
+    ]
+
+# SELECT ke SQL Server per daftar kolom, hanya kolom yang ikut cek perubahan,
+# beserta indeks posisi kolom hasilnya (sama untuk semua baris)
+TARGET_LOOKUP_SQL = {}
+
+def target_lookup_sql(col_names):
+    key = tuple(col_names)
+    lookup = TARGET_LOOKUP_SQL.get(key)
+    if lookup is None:
+        compare_cols = [c for c in col_names if c not in SKIP_FIELDS]
+        col_list_sql = ", ".join(f"[{c}]" for c in compare_cols)
+        sql = f"SELECT {col_list_sql} FROM {SQLSRV_TABLE} WHERE NOURUT1 = ? AND PLANT_ID = ?"
+        lookup = TARGET_LOOKUP_SQL[key] = (sql, {c: i for i, c in enumerate(compare_cols)})
+    return lookup
+
+# === Index lookup di SQL Server ===
+# Lookup target_lookup_sql memfilter NOURUT1, PLANT_ID dan membaca semua kolom
+# yang dibandingkan. Index (NOURUT1, PLANT_ID) saja tetap butuh key lookup ke
+# clustered index per baris; index di bawah memakai INCLUDE semua kolom yang
+# dibandingkan sehingga lookup cukup satu seek di index (covering).
+# Biayanya: index ini kira-kira seukuran tabel (semua kolom kecuali DATE_SYNC)
+# dan setiap INSERT/UPDATE ikut menulis ke index.
+TARGET_INDEX_KEYS = ("NOURUT1", "PLANT_ID")
+
+def target_compare_columns(sqlsrv_cur):
+    """Kolom tabel SQL Server yang ikut dibaca lookup (selain SKIP_FIELDS)."""
+    sqlsrv_cur.execute(
+        "SELECT c.name FROM sys.columns c WHERE c.object_id = OBJECT_ID(?) ORDER BY c.column_id",
+        (SQLSRV_TABLE,)
+    )
+    return [name for (name,) in sqlsrv_cur.fetchall() if name.upper() not in SKIP_FIELDS]
+
+def check_target_index(sqlsrv_cur, compare_cols=None):
+    """(nama index, covering) untuk index yang key-nya diawali (NOURUT1, PLANT_ID), atau (None, False).
+
+    Clustered index selalu covering; nonclustered covering jika key + INCLUDE
+    memuat semua compare_cols.
+    """
+    sqlsrv_cur.execute(
+        "SELECT i.name, i.type, c.name, ic.is_included_column FROM sys.indexes i "
+        "JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id "
+        "JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id "
+        "WHERE i.object_id = OBJECT_ID(?) "
+        "ORDER BY i.index_id, ic.is_included_column, ic.key_ordinal",
+        (SQLSRV_TABLE,)
+    )
+    keys, included, clustered = {}, {}, set()
+    for index_name, index_type, column_name, is_included in sqlsrv_cur.fetchall():
+        if index_type == 1:
+            clustered.add(index_name)
+        if is_included:
+            included.setdefault(index_name, set()).add(column_name.upper())
+        else:
+            keys.setdefault(index_name, []).append(column_name.upper())
+
+    wanted = {c.upper() for c in (compare_cols or [])}
+    found = None
+    for index_name, columns in keys.items():
+        if columns[:2] != list(TARGET_INDEX_KEYS):
+            continue
+        covering = index_name in clustered or wanted <= set(columns) | included.get(index_name, set())
+        if covering:
+            return index_name, True
+        found = found or index_name
+    return found, False
+
+def ensure_target_index(create=False):
+    sqlsrv_conn = connect_sqlserver()
+    sqlsrv_cur = PROFILER.wrap_cursor(sqlsrv_conn.cursor())
+    try:
+        compare_cols = target_compare_columns(sqlsrv_cur)
+        index_name, covering = check_target_index(sqlsrv_cur, compare_cols)
+        if index_name and covering:
+            print(f"Index lookup {SQLSRV_TABLE}: {index_name} (covering)")
+            return index_name
+
+        if not create:
+            if index_name:
+                print(f"⚠️ Index {index_name} di {SQLSRV_TABLE} tidak covering; lookup tetap key lookup per baris. "
+                      f"Jalankan main.py --create-target-index")
+            else:
+                print(f"⚠️ {SQLSRV_TABLE} belum punya index (NOURUT1, PLANT_ID); jalankan main.py --create-target-index")
+            return index_name
+
+        table_name = SQLSRV_TABLE.split(".")[-1].strip("[]")
+        index_name = f"IX_{table_name}_{'_'.join(TARGET_INDEX_KEYS)}_LOOKUP"
+        key_sql = ", ".join(f"[{c}]" for c in TARGET_INDEX_KEYS)
+        include_sql = ", ".join(f"[{c}]" for c in compare_cols)
+        sqlsrv_cur.execute(
+            f"CREATE NONCLUSTERED INDEX [{index_name}] ON {SQLSRV_TABLE} ({key_sql})"
+            + (f" INCLUDE ({include_sql})" if include_sql else "")
+        )
+        sqlsrv_conn.commit()
+        print(f"Index {index_name} dibuat di {SQLSRV_TABLE} (INCLUDE {len(compare_cols)} kolom; "
+              f"ukuran kira-kira setara tabel, setiap tulis ikut mengupdate index)")
+        return index_name
+    finally:
+        sqlsrv_cur.close()
+        sqlsrv_conn.close()
+
+def log_version_filter(entry):
+    """Filter tambahan agar ack hanya mengenai versi baris log yang dibaca saat poll.
+
+    Trigger menulis ulang baris PENDING yang sama (ON DUPLICATE KEY); tanpa
+    filter ini ack bisa menandai tulisan baru yang belum pernah diterapkan.
+    """
+    sql = ""
+    params = ()
+    if 'LOG_TIME' in entry:
+        sql += " AND LOG_TIME = %s"
+        params += (entry.get('LOG_TIME'),)
+    if 'CHANGE_SEQ' in entry:
+        sql += " AND CHANGE_SEQ = %s"
+        params += (entry.get('CHANGE_SEQ'),)
+    return sql, params
+
+def apply_log_entry(entry, mysql_conn, mysql_cur, sqlsrv_conn, sqlsrv_cur, expected_counter=0):
+    """Terapkan satu entri log ke SQL Server.
+
+    Mengembalikan (hasil, counter): hasil SUCCESS, NOOP (data sudah sama),
+    FAILED atau ERROR, dan counter adalah COUNTER_DONE baris log yang
+    memegang hasil itu. expected_counter adalah COUNTER_DONE entri yang
+    boleh diupdate (0 untuk jalur PENDING, nilai sekarang untuk jalur retry).
+    """
     global LAST_STATUS_LOG
 
+    NOURUT1 = entry.get('NOURUT1')
+    PLANT_ID = entry.get('PLANT_ID')
+    aksi = (entry.get('AKSI') or 'UPDATE').upper()
+    version_sql, version_params = log_version_filter(entry)
+
     try:
-        mysql_cur.execute(f"SELECT NOURUT1, AKSI, PLANT_ID FROM {MYSQL_LOG} WHERE STATUS = 'PENDING' ORDER BY log_time")
-        logs = mysql_cur.fetchall()
-        if not logs:
-            STATUS_LOG = "Tidak ada log baru di DB PC untuk diproses"
-            if STATUS_LOG != LAST_STATUS_LOG:
-                print(STATUS_LOG)
-                LAST_STATUS_LOG = STATUS_LOG
-            return
+        MESSAGE_LOG_WANT_TO_CLEAN = entry.get('MESSAGE') or ""
+        MESSAGE_LOG = RE_ERROR_POPULATE.sub("", MESSAGE_LOG_WANT_TO_CLEAN).strip()
 
-        print(f"Menemukan {len(logs)} log; memproses...")
+        mysql_cur.execute(
+            f"SELECT * FROM {MYSQL_LOG} WHERE NOURUT1 = %s AND PLANT_ID = %s order by COUNTER_DONE desc LIMIT 1",
+            (NOURUT1, PLANT_ID)
+        )
+        row_counter_done = mysql_cur.fetchone()
+        row_counter_done_old = row_counter_done['COUNTER_DONE']
+        row_counter_done_update = row_counter_done_old + 1
 
-        for entry in logs:
-            NOURUT1 = entry.get('NOURUT1')
-            PLANT_ID = entry.get('PLANT_ID')
-            aksi = (entry.get('AKSI') or 'UPDATE').upper()
-            
-            try:
-                MESSAGE_LOG_WANT_TO_CLEAN = entry.get('MESSAGE') or ""
-                MESSAGE_LOG = re.sub(r"\s*\|\s*\[Error Populate Data\].*", "", MESSAGE_LOG_WANT_TO_CLEAN).strip()
-                
+        if aksi in ('INSERT', 'UPDATE'):
+            # pakai isi baris dari trigger jika ada, selain itu ambil row dari MySQL
+            row = None
+            if ROW_IMAGE_COLUMNS is not None:
+                row = decode_row_image(entry.get('ROW_IMAGE'), ROW_IMAGE_COLUMNS)
+            if row is None:
                 mysql_cur.execute(
-                    f"SELECT * FROM {MYSQL_LOG} WHERE NOURUT1 = %s AND PLANT_ID = %s order by COUNTER_DONE desc LIMIT 1",
+                    f"SELECT * FROM {MYSQL_TABLE} WHERE NOURUT1 = %s AND PLANT_ID = %s",
                     (NOURUT1, PLANT_ID)
                 )
-                row_counter_done = mysql_cur.fetchone()
-                row_counter_done_old = row_counter_done['COUNTER_DONE']                                                 
-                row_counter_done_update = row_counter_done_old + 1
-                
-                if aksi in ('INSERT', 'UPDATE'):                    
-                    # ambil row dari MySQL
-                    mysql_cur.execute(
-                        f"SELECT * FROM {MYSQL_TABLE} WHERE NOURUT1 = %s AND PLANT_ID = %s",
-                        (NOURUT1, PLANT_ID)
-                    )
-                    row = mysql_cur.fetchone()
-
-                    if not row:
-                        error_notfound_mysql = f"Baris {NOURUT1}-{PLANT_ID} tidak ditemukan di MySQL (skip)."
-                        print(error_notfound_mysql)
-                        
-                        MESSAGE_LOG = error_notfound_mysql
-                        
-                        mysql_cur.execute(
-                            f"UPDATE {MYSQL_LOG} SET STATUS = 'FAILED', MESSAGE = %s, PC_NAME = %s WHERE NOURUT1 = %s AND PLANT_ID = %s",
-                            (MESSAGE_LOG, PC_NAME, NOURUT1, PLANT_ID)
-                        )
-                        mysql_conn.commit()
-                        continue
-                    
-                    # Tambahkan kolom buatan
-                    tanggal_shift = get_shift_date(row.get("TANGGAL2"))
-                    row["TANGGAL_SHIFT"] = tanggal_shift
-                    row["DATE_SYNC"] = datetime.datetime.now()
-                    row["WB_TAG"] = WB_TAG
-                    row["DELETED"] = 0
+                row = mysql_cur.fetchone()
 
-                    col_names = list(row.keys())
+            if not row:
+                error_notfound_mysql = f"Baris {NOURUT1}-{PLANT_ID} tidak ditemukan di MySQL (skip)."
+                print(error_notfound_mysql)
 
-                    # cek apakah sudah ada di SQL Server
-                    sqlsrv_cur.execute(
-                        f"SELECT * FROM {SQLSRV_TABLE} WHERE NOURUT1 = ? AND PLANT_ID = ?",
-                        (row['NOURUT1'], row['PLANT_ID'])
-                    )
-                    old_row = sqlsrv_cur.fetchone()
-                    exists = old_row is not None
-
-                    if exists:
-                        columns = [col[0] for col in sqlsrv_cur.description]
-                        old_dict = dict(zip(columns, old_row))
-                                            
-
-                        # cari kolom yang berubah (selain PK & manual field)
-                        skip_fields = ('NOURUT1', 'PLANT_ID', 'DATE_SYNC')
-                        changed_cols = [
-                            c for c in col_names
-                            if c not in skip_fields and str(row[c]) != str(old_dict.get(c))
-                        ]
-                        
-                        if changed_cols:
-                            set_clause = ", ".join(f"[{c}] = ?" for c in changed_cols)
-                            params = [row[c] for c in changed_cols] + [row['NOURUT1'], row['PLANT_ID']]
-                            update_sql = f"""
-                                UPDATE {SQLSRV_TABLE}
-                                SET {set_clause}, [DATE_SYNC] = ?
-                                WHERE NOURUT1 = ? AND PLANT_ID = ?
-                            """
-                            params = [row[c] for c in changed_cols] + [row["DATE_SYNC"], row['NOURUT1'], row['PLANT_ID']]
-                            sqlsrv_cur.execute(update_sql, params)
-                            sqlsrv_conn.commit()
-                            print(f"UPDATE parsial ({len(changed_cols)} kolom, {', '.join(changed_cols)}): {NOURUT1}-{PLANT_ID}")
-                            
-                            # cek deleted flag
-                            aksi = 'UPDATE'
-                            if old_dict.get('DELETED') != row.get('DELETED'):
-                                aksi = 'INSERT'
-                            
-                            MESSAGE_LOG = "Data updated successfully"
-                            mysql_cur.execute(
-                                f"UPDATE {MYSQL_LOG} SET STATUS = 'SUCCESS', MESSAGE = '{MESSAGE_LOG}', COUNTER_DONE = %s, PC_NAME = %s WHERE NOURUT1 = %s AND PLANT_ID = %s AND AKSI = %s AND COUNTER_DONE = %s",
-                                (row_counter_done_update, PC_NAME, NOURUT1, PLANT_ID, aksi, 0)
-                            )
-                            mysql_conn.commit()
-                            LAST_STATUS_LOG = None
-                            
-                        else:
-                            MESSAGE_LOG = f"Tidak ada perubahan untuk {NOURUT1}-{PLANT_ID}- WantCounterDone: {row_counter_done_update}."
-                            normalized = normalize_error_already_sync(MESSAGE_LOG)
-                            if normalized not in LAST_LOGGED_SYNC:
-                                print(MESSAGE_LOG)
-                                LAST_LOGGED_SYNC.add(normalized)
-                                
-                                mysql_cur.execute(
-                                f"UPDATE {MYSQL_LOG} SET STATUS = 'FAILED', MESSAGE = CONCAT(COALESCE(MESSAGE, ''), ' | [Error Populate Data] : ', %s), COUNTER_DONE = %s, PC_NAME = %s WHERE NOURUT1 = %s AND PLANT_ID = %s AND AKSI = 'UPDATE' AND COUNTER_DONE = %s",
-                                    (MESSAGE_LOG, row_counter_done_update, NOURUT1, PLANT_ID, 0)
-                                )
-                                mysql_conn.commit()                            
-                                                
-                    else:
-                        # INSERT baru
-                        col_list_sql = ", ".join(f"[{c}]" for c in col_names)
-                        placeholders = ", ".join("?" for _ in col_names)
-                        params = [row[c] for c in col_names]
-                        insert_sql = f"INSERT INTO {SQLSRV_TABLE} ({col_list_sql}) VALUES ({placeholders})"
-
-                        try:
-                            sqlsrv_cur.execute(insert_sql, params)
-                            sqlsrv_conn.commit()
-                            print(f"INSERT sukses: {NOURUT1}-{PLANT_ID}")
-                            
-                            MESSAGE_LOG = "Data inserted successfully"
-                            mysql_cur.execute(
-                                f"UPDATE {MYSQL_LOG} SET STATUS = 'SUCCESS', MESSAGE = '{MESSAGE_LOG}', COUNTER_DONE = %s, PC_NAME = %s WHERE NOURUT1 = %s AND PLANT_ID = %s AND AKSI = 'INSERT' AND COUNTER_DONE = %s",
-                                (row_counter_done_update, PC_NAME, NOURUT1, PLANT_ID, 0)
-                            )
-                            mysql_conn.commit()
-                            LAST_STATUS_LOG = None
-                            
-                        except Exception as e:
-                            MESSAGE_LOG = f"Gagal INSERT {NOURUT1}-{PLANT_ID}: {e}"
-                            print(MESSAGE_LOG)
-                            mysql_cur.execute(
-                                f"UPDATE {MYSQL_LOG} SET STATUS = 'FAILED', MESSAGE = CONCAT(COALESCE(MESSAGE, ''), ' | [Error Populate Data] : ', {MESSAGE_LOG}), COUNTER_DONE = %s, PC_NAME = %s WHERE NOURUT1 = %s AND PLANT_ID = %s AND AKSI = 'INSERT' AND COUNTER_DONE = %s",
-                                (row_counter_done_update, PC_NAME, NOURUT1, PLANT_ID, 0)
-                            )
-                            mysql_conn.commit()
-                            continue
-
-                elif aksi == 'DELETE':
-                    try:
-                        sqlsrv_cur.execute(
-                            f"UPDATE {SQLSRV_TABLE} SET deleted = 1 WHERE NOURUT1 = ? AND PLANT_ID = ?",
-                            (NOURUT1, PLANT_ID)
-                        )
-                        sqlsrv_conn.commit()
-                                                
-                        MESSAGE_LOG = "Data deleted successfully"
-                        mysql_cur.execute(
-                            f"UPDATE {MYSQL_LOG} SET STATUS = 'SUCCESS', MESSAGE = '{MESSAGE_LOG}', COUNTER_DONE = %s, PC_NAME = %s WHERE NOURUT1 = %s AND PLANT_ID = %s AND AKSI = 'DELETE' AND COUNTER_DONE = %s",
-                            (row_counter_done_update, PC_NAME, NOURUT1, PLANT_ID, 0)
-                        )
-                        mysql_conn.commit()
-                        LAST_STATUS_LOG = None
-                        
-                        print(f"DELETE flag sukses: {NOURUT1}-{PLANT_ID}")
-                    except Exception as e:
-                        MESSAGE_LOG = f"Gagal update deleted flag {NOURUT1}-{PLANT_ID}: {e}"
-                        print(MESSAGE_LOG)
-                        mysql_cur.execute(
-                            f"UPDATE {MYSQL_LOG} SET STATUS = 'FAILED', MESSAGE = CONCAT(COALESCE(MESSAGE, ''), ' | [Error Populate Data] : ', {MESSAGE_LOG}), COUNTER_DONE = %s, PC_NAME = %s WHERE NOURUT1 = %s AND PLANT_ID = %s AND AKSI = 'DELETE' AND COUNTER_DONE = %s",
-                            (row_counter_done_update, PC_NAME, NOURUT1, PLANT_ID, 0)
-                        )
-                        mysql_conn.commit()
-                        continue
+                MESSAGE_LOG = error_notfound_mysql
 
-                else:
-                    MESSAGE_LOG = f"Aksi tidak dikenal ({aksi})"
-                    print(MESSAGE_LOG)
+                mysql_cur.execute(
+                    f"UPDATE {MYSQL_LOG} SET STATUS = 'FAILED', MESSAGE = %s, PC_NAME = %s WHERE NOURUT1 = %s AND PLANT_ID = %s AND COUNTER_DONE = %s{version_sql}",
+                    (MESSAGE_LOG, PC_NAME, NOURUT1, PLANT_ID, expected_counter) + version_params
+                )
+                mysql_conn.commit()
+                return "FAILED", expected_counter
+
+            # Tambahkan kolom buatan
+            add_derived_columns(row)
+
+            col_names = list(row.keys())
+
+            # cek apakah sudah ada di SQL Server
+            lookup_sql, old_index = target_lookup_sql(col_names)
+            sqlsrv_cur.execute(lookup_sql, (row['NOURUT1'], row['PLANT_ID']))
+            old_row = sqlsrv_cur.fetchone()
+            exists = old_row is not None
+
+            if exists:
+                # cari kolom yang berubah (selain PK & manual field)
+                changed_cols = find_changed_columns(row, old_row, old_index, col_names)
+
+                if changed_cols:
+                    set_clause = ", ".join(f"[{c}] = ?" for c in changed_cols)
+                    update_sql = f"""
+                        UPDATE {SQLSRV_TABLE}
+                        SET {set_clause}, [DATE_SYNC] = ?
+                        WHERE NOURUT1 = ? AND PLANT_ID = ?
+                    """
+                    params = [row[c] for c in changed_cols] + [row["DATE_SYNC"], row['NOURUT1'], row['PLANT_ID']]
+                    sqlsrv_cur.execute(update_sql, params)
+                    sqlsrv_conn.commit()
+                    print(f"UPDATE parsial ({len(changed_cols)} kolom, {', '.join(changed_cols)}): {NOURUT1}-{PLANT_ID}")
+
+                    # cek deleted flag
+                    aksi = 'UPDATE'
+                    if old_row[old_index['DELETED']] != row.get('DELETED'):
+                        aksi = 'INSERT'
+
+                    MESSAGE_LOG = "Data updated successfully"
                     mysql_cur.execute(
-                        f"UPDATE {MYSQL_LOG} SET STATUS = 'FAILED', MESSAGE = CONCAT(COALESCE(MESSAGE, ''), ' | [Error Populate Data] : ', {MESSAGE_LOG}), COUNTER_DONE = %s, PC_NAME = %s WHERE NOURUT1 = %s AND PLANT_ID = %s AND AKSI = '{aksi}' AND COUNTER_DONE = %s",
-                        (row_counter_done_update, PC_NAME, NOURUT1, PLANT_ID, 0)
+                        f"UPDATE {MYSQL_LOG} SET STATUS = 'SUCCESS', MESSAGE = '{MESSAGE_LOG}', COUNTER_DONE = %s, PC_NAME = %s{ROW_IMAGE_CLEAR} WHERE NOURUT1 = %s AND PLANT_ID = %s AND AKSI = %s AND COUNTER_DONE = %s{version_sql}",
+                        (row_counter_done_update, PC_NAME, NOURUT1, PLANT_ID, aksi, expected_counter) + version_params
                     )
                     mysql_conn.commit()
-                        
-                    # mysql_cur.execute(
-                    #     f"DELETE FROM {MYSQL_LOG} WHERE NOURUT1 = %s AND PLANT_ID = %s",
-                    #     (NOURUT1, PLANT_ID)
-                    # )
-                    # mysql_conn.commit()
+                    LAST_STATUS_LOG = None
+                    return "SUCCESS", row_counter_done_update
 
-            except Exception as e:
-                MESSAGE_LOG = f"ERROR processing {NOURUT1}-{PLANT_ID}: {e}"
+                MESSAGE_LOG = f"Tidak ada perubahan untuk {NOURUT1}-{PLANT_ID}- WantCounterDone: {row_counter_done_update}."
                 normalized = normalize_error_already_sync(MESSAGE_LOG)
-                if normalized not in LAST_LOGGED_ERROR_PROCESSING:
+                if not LAST_LOGGED_SYNC.seen(normalized):
                     print(MESSAGE_LOG)
-                    LAST_LOGGED_ERROR_PROCESSING.add(normalized)
-                    mysql_cur.execute(
-                        f"UPDATE {MYSQL_LOG} SET MESSAGE = CONCAT(COALESCE(MESSAGE, ''), ' | [Error Populate Data] : ', %s), PC_NAME = %s WHERE NOURUT1 = %s AND PLANT_ID = %s AND COUNTER_DONE = %s",
-                        (MESSAGE_LOG, PC_NAME, NOURUT1, PLANT_ID, 0)
-                    )
-                    mysql_conn.commit()
-                
-                continue
 
+                # ack tetap ditulis: batch yang dibatalkan memproses ulang entri yang sama
+                mysql_cur.execute(
+                    f"UPDATE {MYSQL_LOG} SET STATUS = 'FAILED', MESSAGE = CONCAT(COALESCE(MESSAGE, ''), ' | [Error Populate Data] : ', %s), COUNTER_DONE = %s, PC_NAME = %s{ROW_IMAGE_CLEAR} WHERE NOURUT1 = %s AND PLANT_ID = %s AND AKSI = 'UPDATE' AND COUNTER_DONE = %s{version_sql}",
+                    (MESSAGE_LOG, row_counter_done_update, PC_NAME, NOURUT1, PLANT_ID, expected_counter) + version_params
+                )
+                mysql_conn.commit()
+                return "NOOP", row_counter_done_update
+
+            # INSERT baru
+            col_list_sql = ", ".join(f"[{c}]" for c in col_names)
+            placeholders = ", ".join("?" for _ in col_names)
+            params = [row[c] for c in col_names]
+            insert_sql = f"INSERT INTO {SQLSRV_TABLE} ({col_list_sql}) VALUES ({placeholders})"
+
+            try:
+                sqlsrv_cur.execute(insert_sql, params)
+                sqlsrv_conn.commit()
+                print(f"INSERT sukses: {NOURUT1}-{PLANT_ID}")
+
+                MESSAGE_LOG = "Data inserted successfully"
+                mysql_cur.execute(
+                    f"UPDATE {MYSQL_LOG} SET STATUS = 'SUCCESS', MESSAGE = '{MESSAGE_LOG}', COUNTER_DONE = %s, PC_NAME = %s{ROW_IMAGE_CLEAR} WHERE NOURUT1 = %s AND PLANT_ID = %s AND AKSI = 'INSERT' AND COUNTER_DONE = %s{version_sql}",
+                    (row_counter_done_update, PC_NAME, NOURUT1, PLANT_ID, expected_counter) + version_params
+                )
+                mysql_conn.commit()
+                LAST_STATUS_LOG = None
+                return "SUCCESS", row_counter_done_update
+
+            except Exception as e:
+                MESSAGE_LOG = f"Gagal INSERT {NOURUT1}-{PLANT_ID}: {e}"
+                print(MESSAGE_LOG)
+                mysql_cur.execute(
+                    f"UPDATE {MYSQL_LOG} SET STATUS = 'FAILED', MESSAGE = CONCAT(COALESCE(MESSAGE, ''), ' | [Error Populate Data] : ', %s), COUNTER_DONE = %s, PC_NAME = %s WHERE NOURUT1 = %s AND PLANT_ID = %s AND AKSI = 'INSERT' AND COUNTER_DONE = %s{version_sql}",
+                    (MESSAGE_LOG, row_counter_done_update, PC_NAME, NOURUT1, PLANT_ID, expected_counter) + version_params
+                )
+                mysql_conn.commit()
+                return "FAILED", row_counter_done_update
+
+        elif aksi == 'DELETE':
+            try:
+                sqlsrv_cur.execute(
+                    f"UPDATE {SQLSRV_TABLE} SET deleted = 1 WHERE NOURUT1 = ? AND PLANT_ID = ?",
+                    (NOURUT1, PLANT_ID)
+                )
+                sqlsrv_conn.commit()
+
+                MESSAGE_LOG = "Data deleted successfully"
+                mysql_cur.execute(
+                    f"UPDATE {MYSQL_LOG} SET STATUS = 'SUCCESS', MESSAGE = '{MESSAGE_LOG}', COUNTER_DONE = %s, PC_NAME = %s{ROW_IMAGE_CLEAR} WHERE NOURUT1 = %s AND PLANT_ID = %s AND AKSI = 'DELETE' AND COUNTER_DONE = %s{version_sql}",
+                    (row_counter_done_update, PC_NAME, NOURUT1, PLANT_ID, expected_counter) + version_params
+                )
+                mysql_conn.commit()
+                LAST_STATUS_LOG = None
+
+                print(f"DELETE flag sukses: {NOURUT1}-{PLANT_ID}")
+                return "SUCCESS", row_counter_done_update
+            except Exception as e:
+                MESSAGE_LOG = f"Gagal update deleted flag {NOURUT1}-{PLANT_ID}: {e}"
+                print(MESSAGE_LOG)
+                mysql_cur.execute(
+                    f"UPDATE {MYSQL_LOG} SET STATUS = 'FAILED', MESSAGE = CONCAT(COALESCE(MESSAGE, ''), ' | [Error Populate Data] : ', %s), COUNTER_DONE = %s, PC_NAME = %s WHERE NOURUT1 = %s AND PLANT_ID = %s AND AKSI = 'DELETE' AND COUNTER_DONE = %s{version_sql}",
+                    (MESSAGE_LOG, row_counter_done_update, PC_NAME, NOURUT1, PLANT_ID, expected_counter) + version_params
+                )
+                mysql_conn.commit()
+                return "FAILED", row_counter_done_update
+
+        else:
+            MESSAGE_LOG = f"Aksi tidak dikenal ({aksi})"
+            print(MESSAGE_LOG)
+            mysql_cur.execute(
+                f"UPDATE {MYSQL_LOG} SET STATUS = 'FAILED', MESSAGE = CONCAT(COALESCE(MESSAGE, ''), ' | [Error Populate Data] : ', %s), COUNTER_DONE = %s, PC_NAME = %s WHERE NOURUT1 = %s AND PLANT_ID = %s AND AKSI = %s AND COUNTER_DONE = %s{version_sql}",
+                (MESSAGE_LOG, row_counter_done_update, PC_NAME, NOURUT1, PLANT_ID, aksi, expected_counter) + version_params
+            )
+            mysql_conn.commit()
+            return "FAILED", row_counter_done_update
+
+    except Exception as e:
+        MESSAGE_LOG = f"ERROR processing {NOURUT1}-{PLANT_ID}: {e}"
+        if isinstance(mysql_conn, DeferredCommit):
+            # di dalam batch: batch dibatalkan dan entri ini diproses ulang per baris,
+            # pesan dicatat (dan masuk dedup cache) di percobaan itu
+            return "ERROR", expected_counter
+        normalized = normalize_error_already_sync(MESSAGE_LOG)
+        if not LAST_LOGGED_ERROR_PROCESSING.seen(normalized):
+            print(MESSAGE_LOG)
+            mysql_cur.execute(
+                f"UPDATE {MYSQL_LOG} SET MESSAGE = CONCAT(COALESCE(MESSAGE, ''), ' | [Error Populate Data] : ', %s), PC_NAME = %s WHERE NOURUT1 = %s AND PLANT_ID = %s AND COUNTER_DONE = %s{version_sql}",
+                (MESSAGE_LOG, PC_NAME, NOURUT1, PLANT_ID, expected_counter) + version_params
+            )
+            mysql_conn.commit()
+        return "ERROR", expected_counter
+
+
+# === Retry scheduler ===
+def retry_delay(attempt):
+    """Jeda backoff eksponensial (detik) sebelum percobaan ke-`attempt`."""
+    return min(RETRY_BASE_DELAY * (2 ** (attempt - 1)), RETRY_MAX_DELAY)
+
+def schedule_retry(entry, counter, mysql_conn, mysql_cur):
+    """Jadwalkan ulang entri gagal, atau pindahkan ke DEAD jika percobaan habis.
+
+    Hanya baris log dengan COUNTER_DONE = counter (baris yang gagal) yang
+    diubah; riwayat SUCCESS dan entri PENDING baru untuk key yang sama tidak.
+    """
+    attempt = (entry.get('RETRY_COUNT') or 0) + 1
+    NOURUT1 = entry.get('NOURUT1')
+    PLANT_ID = entry.get('PLANT_ID')
+    version_sql, version_params = log_version_filter(entry)
+
+    if attempt >= RETRY_MAX_ATTEMPTS:
+        mysql_cur.execute(
+            f"UPDATE {MYSQL_LOG} SET STATUS = 'DEAD', RETRY_COUNT = %s, NEXT_RETRY_AT = NULL WHERE NOURUT1 = %s AND PLANT_ID = %s AND COUNTER_DONE = %s{version_sql}",
+            (attempt, NOURUT1, PLANT_ID, counter) + version_params
+        )
+        print(f"Entri {NOURUT1}-{PLANT_ID} dipindah ke DEAD setelah {attempt} percobaan.")
+    else:
+        mysql_cur.execute(
+            f"UPDATE {MYSQL_LOG} SET STATUS = 'FAILED', RETRY_COUNT = %s, NEXT_RETRY_AT = NOW() + INTERVAL %s SECOND WHERE NOURUT1 = %s AND PLANT_ID = %s AND COUNTER_DONE = %s{version_sql}",
+            (attempt, retry_delay(attempt), NOURUT1, PLANT_ID, counter) + version_params
+        )
+    mysql_conn.commit()
+
+def clear_retry(entry, counter, mysql_conn, mysql_cur):
+    mysql_cur.execute(
+        f"UPDATE {MYSQL_LOG} SET RETRY_COUNT = 0, NEXT_RETRY_AT = NULL WHERE NOURUT1 = %s AND PLANT_ID = %s AND COUNTER_DONE = %s",
+        (entry.get('NOURUT1'), entry.get('PLANT_ID'), counter)
+    )
+    mysql_conn.commit()
+
+# === Apply per batch dengan offset di SQL Server ===
+class DeferredCommit:
+    """Koneksi yang commit()-nya diabaikan; commit dilakukan sekali per batch oleh apply_batch."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def commit(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+class DeferredWriteCursor:
+    """Cursor MySQL untuk batch: SELECT langsung dijalankan, UPDATE ack ditahan sampai flush().
+
+    Tanpa ini baris log yang sudah di-ack terkunci sampai commit batch dan
+    trigger di tb_timbang2 ikut menunggu selama seluruh batch diterapkan.
+    """
+
+    def __init__(self, cur):
+        self.cur = cur
+        self.pending = []
+
+    def execute(self, sql, params=None):
+        if sql.lstrip()[:6].upper() == "SELECT":
+            return self.cur.execute(sql, params)
+        self.pending.append((sql, params))
+
+    def flush(self):
+        for sql, params in self.pending:
+            self.cur.execute(sql, params)
+        self.pending = []
+
+    def __getattr__(self, name):
+        return getattr(self.cur, name)
+
+def check_offset_table(sqlsrv_conn, sqlsrv_cur):
+    global OFFSET_TABLE_READY
+
+    if OFFSET_TABLE_READY is None:
+        sqlsrv_cur.execute("SELECT OBJECT_ID(?), COL_LENGTH(?, 'CHANGE_SEQ')", (SQLSRV_OFFSET_TABLE, SQLSRV_OFFSET_TABLE))
+        table_id, change_seq_len = sqlsrv_cur.fetchone()
+        OFFSET_TABLE_READY = table_id is not None and change_seq_len is not None
+        sqlsrv_conn.commit()
+        if table_id is None:
+            print(f"⚠️ Tabel {SQLSRV_OFFSET_TABLE} belum ada (lihat applied_offsets.sql); apply tetap per baris.")
+        elif not OFFSET_TABLE_READY:
+            print(f"⚠️ Tabel {SQLSRV_OFFSET_TABLE} masih format lama (BATCH_ID); buat ulang sesuai applied_offsets.sql. Apply tetap per baris.")
+    return OFFSET_TABLE_READY
+
+def check_log_change_seq(mysql_conn, mysql_cur):
+    global LOG_CHANGE_SEQ_READY
+
+    if LOG_CHANGE_SEQ_READY is None:
+        mysql_cur.execute(
+            "SELECT COUNT(*) AS jumlah FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = 'CHANGE_SEQ'",
+            (MYSQL_LOG,)
+        )
+        LOG_CHANGE_SEQ_READY = mysql_cur.fetchone()['jumlah'] > 0
+        mysql_conn.commit()
+        if not LOG_CHANGE_SEQ_READY:
+            print(f"⚠️ Kolom CHANGE_SEQ belum ada di {MYSQL_LOG} (lihat applied_offsets.sql); apply tetap per baris.")
+    return LOG_CHANGE_SEQ_READY
+
+def batch_apply_ready(mysql_conn, mysql_cur, sqlsrv_conn, sqlsrv_cur):
+    return (APPLY_BATCH_SIZE > 1
+            and check_log_change_seq(mysql_conn, mysql_cur)
+            and check_offset_table(sqlsrv_conn, sqlsrv_cur))
+
+def ack_applied_batch(entries, results, mysql_conn, mysql_cur):
+    """Tandai log untuk entri yang sudah ter-commit di SQL Server tanpa menerapkannya lagi."""
+    acked = []
+    for entry, code in zip(entries, results):
+        NOURUT1 = entry.get('NOURUT1')
+        PLANT_ID = entry.get('PLANT_ID')
+
+        # counter berikutnya dihitung sama seperti apply_log_entry
+        mysql_cur.execute(
+            f"SELECT COUNTER_DONE FROM {MYSQL_LOG} WHERE NOURUT1 = %s AND PLANT_ID = %s order by COUNTER_DONE desc LIMIT 1",
+            (NOURUT1, PLANT_ID)
+        )
+        counter = mysql_cur.fetchone()['COUNTER_DONE'] + 1
+
+        params = (counter, PC_NAME, NOURUT1, PLANT_ID, entry.get('LOG_TIME'), entry.get('CHANGE_SEQ'))
+        if code == "S":
+            mysql_cur.execute(
+                f"UPDATE {MYSQL_LOG} SET STATUS = 'SUCCESS', MESSAGE = 'Data applied (batch replay)', COUNTER_DONE = %s, PC_NAME = %s{ROW_IMAGE_CLEAR} WHERE NOURUT1 = %s AND PLANT_ID = %s AND LOG_TIME = %s AND CHANGE_SEQ = %s AND COUNTER_DONE = 0",
+                params
+            )
+            acked.append(("SUCCESS", counter))
+        else:
+            mysql_cur.execute(
+                f"UPDATE {MYSQL_LOG} SET STATUS = 'FAILED', MESSAGE = CONCAT(COALESCE(MESSAGE, ''), ' | [Error Populate Data] : ', 'Tidak ada perubahan (batch replay)'), COUNTER_DONE = %s, PC_NAME = %s{ROW_IMAGE_CLEAR} WHERE NOURUT1 = %s AND PLANT_ID = %s AND LOG_TIME = %s AND CHANGE_SEQ = %s AND COUNTER_DONE = 0",
+                params
+            )
+            acked.append(("NOOP", counter))
+    mysql_conn.commit()
+    return acked
+
+def find_applied_offsets(entries, sqlsrv_conn, sqlsrv_cur):
+    """(done, todo) untuk entri batch; lihat offsets.split_applied."""
+    applied_rows = []
+    for start in range(0, len(entries), OFFSET_LOOKUP_CHUNK):
+        chunk = entries[start:start + OFFSET_LOOKUP_CHUNK]
+        sqlsrv_cur.execute(applied_lookup_sql(SQLSRV_OFFSET_TABLE, len(chunk)), applied_lookup_params(WB_TAG, chunk))
+        applied_rows.extend(sqlsrv_cur.fetchall())
+    sqlsrv_conn.commit()
+    return split_applied(entries, applied_rows)
+
+def apply_batch(entries, mysql_conn, mysql_cur, sqlsrv_conn, sqlsrv_cur):
+    """Terapkan beberapa entri dengan satu commit SQL Server dan satu commit MySQL.
+
+    Offset setiap entri (NOURUT1, PLANT_ID, CHANGE_SEQ) ditulis ke
+    SQLSRV_OFFSET_TABLE di transaksi SQL Server yang sama dengan datanya.
+    Jika proses mati di antara kedua commit, entri itu muncul lagi sebagai
+    PENDING dengan CHANGE_SEQ yang sama dan hanya di-ack, apa pun isi dan
+    urutan batch berikutnya. Entri baru hanya di-commit jika semuanya
+    SUCCESS/NOOP; selain itu dibatalkan dan diproses ulang per baris.
+    """
+    done, todo = find_applied_offsets(entries, sqlsrv_conn, sqlsrv_cur)
+
+    results_by_entry = {}
+    if done:
+        print(f"{len(done)} entri sudah diterapkan sebelumnya; hanya ack di MySQL.")
+        acked = ack_applied_batch([entry for entry, _ in done], [code for _, code in done], mysql_conn, mysql_cur)
+        for (entry, _), result in zip(done, acked):
+            results_by_entry[id(entry)] = result
+    if todo:
+        for entry, result in zip(todo, apply_new_entries(todo, mysql_conn, mysql_cur, sqlsrv_conn, sqlsrv_cur)):
+            results_by_entry[id(entry)] = result
+    return [results_by_entry[id(entry)] for entry in entries]
+
+def apply_new_entries(entries, mysql_conn, mysql_cur, sqlsrv_conn, sqlsrv_cur):
+    deferred_mysql = DeferredCommit(mysql_conn)
+    deferred_sqlsrv = DeferredCommit(sqlsrv_conn)
+    deferred_cur = DeferredWriteCursor(mysql_cur)
+    results = []
+    try:
+        for entry in entries:
+            result, counter = apply_log_entry(entry, deferred_mysql, deferred_cur, deferred_sqlsrv, sqlsrv_cur)
+            results.append((result, counter))
+            if result not in ("SUCCESS", "NOOP"):
+                break
+        else:
+            sqlsrv_cur.executemany(
+                f"INSERT INTO {SQLSRV_OFFSET_TABLE} (WB_TAG, NOURUT1, PLANT_ID, CHANGE_SEQ, LOG_TIME, RESULT, PC_NAME) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                offset_rows(WB_TAG, entries, results, PC_NAME)
+            )
+            sqlsrv_conn.commit()
+            # ack ditulis setelah SQL Server commit: kunci baris log hanya dipegang sebentar
+            deferred_cur.flush()
+            mysql_conn.commit()
+            return results
+    except:
+        sqlsrv_conn.rollback()
+        mysql_conn.rollback()
+        raise
+
+    sqlsrv_conn.rollback()
+    mysql_conn.rollback()
+    print(f"Batch {len(entries)} entri dibatalkan ({results[-1][0]} di entri ke-{len(results)}); diproses ulang per baris.")
+    return [apply_log_entry(entry, mysql_conn, mysql_cur, sqlsrv_conn, sqlsrv_cur) for entry in entries]
+
+def apply_entries(entries, mysql_conn, mysql_cur, sqlsrv_conn, sqlsrv_cur):
+    """Terapkan entri PENDING berurutan, per APPLY_BATCH_SIZE entri jika batch_apply_ready."""
+    batch_size = 1
+    if batch_apply_ready(mysql_conn, mysql_cur, sqlsrv_conn, sqlsrv_cur):
+        batch_size = APPLY_BATCH_SIZE
+        # batch membaca tb_timbang2 dalam satu transaksi MySQL; READ COMMITTED agar
+        # setiap SELECT melihat data terbaru, bukan snapshot dari awal transaksi
+        mysql_conn.commit()
+        mysql_cur.execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED")
+
+    results = []
+    for start in range(0, len(entries), batch_size):
+        chunk = entries[start:start + batch_size]
+        if batch_size > 1:
+            chunk_results = apply_batch(chunk, mysql_conn, mysql_cur, sqlsrv_conn, sqlsrv_cur)
+        else:
+            chunk_results = [apply_log_entry(chunk[0], mysql_conn, mysql_cur, sqlsrv_conn, sqlsrv_cur)]
+
+        for entry, (result, counter) in zip(chunk, chunk_results):
+            SYNC_STATS.record(entry, result)
+            # entri gagal keluar dari jalur PENDING dan masuk antrean retry
+            if RETRY_ENABLED and result in ("FAILED", "ERROR"):
+                schedule_retry(entry, counter, mysql_conn, mysql_cur)
+        results.extend(chunk_results)
+    return results
+
+def prune_applied_offsets():
+    """Hapus offset apply station ini yang lebih tua dari OFFSET_RETENTION_DAYS."""
+    global LAST_OFFSET_PRUNE
+
+    now = time.monotonic()
+    if LAST_OFFSET_PRUNE is not None and now - LAST_OFFSET_PRUNE < LOG_MAINTENANCE_INTERVAL:
+        return
+    LAST_OFFSET_PRUNE = now
+
+    sqlsrv_conn = connect_sqlserver()
+    sqlsrv_cur = PROFILER.wrap_cursor(sqlsrv_conn.cursor())
+    try:
+        if not check_offset_table(sqlsrv_conn, sqlsrv_cur):
+            return
+        sqlsrv_cur.execute(
+            f"DELETE FROM {SQLSRV_OFFSET_TABLE} WHERE WB_TAG = ? AND APPLIED_AT < DATEADD(day, ?, GETDATE())",
+            (WB_TAG, -OFFSET_RETENTION_DAYS)
+        )
+        deleted = sqlsrv_cur.rowcount
+        sqlsrv_conn.commit()
+        if deleted and deleted > 0:
+            print(f"Offset apply: {deleted} baris lebih tua dari {OFFSET_RETENTION_DAYS} hari dibersihkan.")
+    finally:
+        sqlsrv_cur.close()
+        sqlsrv_conn.close()
+
+# === Apply paralel per key ===
+def key_partition(entry, n):
+    """Worker tujuan untuk (NOURUT1, PLANT_ID); key yang sama selalu ke worker yang sama."""
+    key = f"{entry.get('NOURUT1')}|{entry.get('PLANT_ID')}"
+    return zlib.crc32(key.encode("utf-8")) % n
+
+def _apply_worker(entries):
+    mysql_conn = MYSQL_POOL.acquire()
+    try:
+        sqlsrv_conn = SQLSERVER_POOL.acquire()
+    except:
+        MYSQL_POOL.release(mysql_conn)
+        raise
+    healthy = True
+    try:
+        mysql_cur = PROFILER.wrap_cursor(mysql_conn.cursor(dictionary=True))
+        sqlsrv_cur = PROFILER.wrap_cursor(sqlsrv_conn.cursor())
+        try:
+            # urutan entri dalam satu key tetap sesuai urutan log
+            results = apply_entries(entries, mysql_conn, mysql_cur, sqlsrv_conn, sqlsrv_cur)
+            if any(result == "ERROR" for result, _ in results):
+                healthy = False
+        finally:
+            mysql_cur.close()
+            sqlsrv_cur.close()
+        # tutup snapshot baca yang masih terbuka sebelum koneksi dipakai ulang
+        mysql_conn.commit()
+        sqlsrv_conn.commit()
+    except:
+        healthy = False
+        raise
+    finally:
+        if healthy:
+            MYSQL_POOL.release(mysql_conn)
+            SQLSERVER_POOL.release(sqlsrv_conn)
+        else:
+            MYSQL_POOL.discard(mysql_conn)
+            SQLSERVER_POOL.discard(sqlsrv_conn)
+
+def apply_entries_parallel(logs):
+    from concurrent.futures import ThreadPoolExecutor
+
+    buckets = [[] for _ in range(APPLY_WORKERS)]
+    for entry in logs:
+        buckets[key_partition(entry, APPLY_WORKERS)].append(entry)
+
+    with ThreadPoolExecutor(max_workers=APPLY_WORKERS, thread_name_prefix="apply") as executor:
+        futures = [executor.submit(_apply_worker, bucket) for bucket in buckets if bucket]
+        for future in futures:
+            future.result()
+
+def sync_data_timbang():
+    # --- koneksi ke SQL Server ---
+    sqlsrv_conn = connect_sqlserver()
+    sqlsrv_cur = PROFILER.wrap_cursor(sqlsrv_conn.cursor())
+
+    # --- koneksi ke MySQL ---
+    mysql_conn = connect_mysql()
+    mysql_cur = PROFILER.wrap_cursor(mysql_conn.cursor(dictionary=True))
+    
+    global LAST_STATUS_LOG, ROW_IMAGE_COLUMNS, FIRST_POLL_DONE
+
+    try:
+        if APPLY_FROM_ROW_IMAGE and ROW_IMAGE_COLUMNS is None:
+            ROW_IMAGE_COLUMNS = load_column_types(mysql_cur, MYSQL_TABLE)
+
+        extra_cols = ""
+        if RETRY_ENABLED:
+            extra_cols += ", RETRY_COUNT"
+        if APPLY_FROM_ROW_IMAGE:
+            extra_cols += ", ROW_IMAGE"
+        if batch_apply_ready(mysql_conn, mysql_cur, sqlsrv_conn, sqlsrv_cur):
+            extra_cols += ", CHANGE_SEQ"
+        mysql_cur.execute(f"SELECT NOURUT1, AKSI, PLANT_ID, LOG_TIME{extra_cols} FROM {MYSQL_LOG} WHERE STATUS = 'PENDING' ORDER BY LOG_TIME, NOURUT1, PLANT_ID")
+        logs = mysql_cur.fetchall()
+        if not FIRST_POLL_DONE:
+            # budget diukur sampai poll pertama, sebelum backlog diterapkan
+            FIRST_POLL_DONE = True
+            check_startup_budget("sampai poll pertama selesai")
+        SYNC_STATS.begin_cycle(len(logs))
+        if not logs:
+            STATUS_LOG = "Tidak ada log baru di DB PC untuk diproses"
+            if STATUS_LOG != LAST_STATUS_LOG:
+                print(STATUS_LOG)
+                LAST_STATUS_LOG = STATUS_LOG
+            return
+
+        print(f"Menemukan {len(logs)} log; memproses...")
+
+        if APPLY_WORKERS > 1:
+            apply_entries_parallel(logs)
+        else:
+            apply_entries(logs, mysql_conn, mysql_cur, sqlsrv_conn, sqlsrv_cur)
+
+        SYNC_STATS.end_cycle()
+        print(f"Dedup cache sync: {LAST_LOGGED_SYNC.stats()} | error: {LAST_LOGGED_ERROR_PROCESSING.stats()}")
         print("=== Sinkronisasi selesai ===")
 
     finally:
@@ -366,15 +1054,61 @@ def sync_data_timbang():
         except:
             pass
 
+def retry_failed_entries():
+    """Jalur prioritas rendah: proses ulang entri FAILED yang sudah jatuh tempo."""
+    mysql_conn = connect_mysql()
+    mysql_cur = PROFILER.wrap_cursor(mysql_conn.cursor(dictionary=True))
+    sqlsrv_conn = None
+    sqlsrv_cur = None
+
+    try:
+        mysql_cur.execute(
+            f"SELECT NOURUT1, AKSI, PLANT_ID, LOG_TIME, COUNTER_DONE, RETRY_COUNT FROM {MYSQL_LOG} "
+            f"WHERE STATUS = 'FAILED' AND NEXT_RETRY_AT IS NOT NULL AND NEXT_RETRY_AT <= NOW() "
+            f"ORDER BY NEXT_RETRY_AT LIMIT %s",
+            (RETRY_BATCH,)
+        )
+        entries = mysql_cur.fetchall()
+        if not entries:
+            return
+
+        sqlsrv_conn = connect_sqlserver()
+        sqlsrv_cur = PROFILER.wrap_cursor(sqlsrv_conn.cursor())
+        print(f"Retry {len(entries)} entri gagal...")
+
+        for entry in entries:
+            result, counter = apply_log_entry(
+                entry, mysql_conn, mysql_cur, sqlsrv_conn, sqlsrv_cur,
+                expected_counter=entry.get('COUNTER_DONE') or 0
+            )
+            SYNC_STATS.record(entry, result, pending=False)
+            if result in ("SUCCESS", "NOOP"):
+                clear_retry(entry, counter, mysql_conn, mysql_cur)
+            else:
+                schedule_retry(entry, counter, mysql_conn, mysql_cur)
+
+    finally:
+        try:
+            mysql_cur.close()
+            mysql_conn.close()
+        except:
+            pass
+        try:
+            if sqlsrv_conn is not None:
+                sqlsrv_cur.close()
+                sqlsrv_conn.close()
+        except:
+            pass
+
 def sync_data_timbang_log():
     global LAST_SYNC_STATUS_LOG
     
     try:
-        mysql_conn = mysql.connector.connect(**MYSQL_CONN)
-        mysql_cursor = mysql_conn.cursor(dictionary=True)
+        mysql_conn = connect_mysql()
+        mysql_cursor = PROFILER.wrap_cursor(mysql_conn.cursor(dictionary=True))
 
         mysql_cursor.execute(f"""
-            SELECT * FROM {MYSQL_LOG} 
+            SELECT NOURUT1, PLANT_ID, AKSI, COUNTER_DONE, PC_NAME, STATUS, MESSAGE, LOG_TIME FROM {MYSQL_LOG}
             WHERE (SYNC_STATUS IS NULL OR SYNC_STATUS != 'SENT')
             ORDER BY LOG_TIME ASC
             LIMIT 100
@@ -390,18 +1124,13 @@ def sync_data_timbang_log():
             mysql_conn.close()
             return
 
-        sqlsrv_cur = pyodbc.connect(
-            f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-            f"SERVER={SQLSERVER_CONN['server']};"
-            f"DATABASE={SQLSERVER_CONN['database']};"
-            f"UID={SQLSERVER_CONN['username']};PWD={SQLSERVER_CONN['password']}"
-        )
-        sql_cursor = sqlsrv_cur.cursor()
+        sqlsrv_cur = connect_sqlserver()
+        sql_cursor = PROFILER.wrap_cursor(sqlsrv_cur.cursor())
 
         for log in logs:
             try:
                 message = log.get("MESSAGE") or ""
-                message_clean = re.sub(r"\s*\|\s*\[Error Sync to Log SqlServer\].*", "", message).strip()
+                message_clean = RE_ERROR_SYNC_LOG.sub("", message).strip()
         
                 sql_cursor.execute(f"""
                     INSERT INTO {SQLSERVER_LOG} (NOURUT1, PLANT_ID, AKSI, COUNTER_DONE, PC_NAME, STATUS, MESSAGE, LOG_TIME)
@@ -450,15 +1179,260 @@ def sync_data_timbang_log():
     except Exception as e:
         print(f"[FATAL SYNC Data Timbang Log] {e}")
 
+def maintain_timbang_log():
+    """Kompaksi berkala tabel log, dibatasi LOG_COMPACT_MAX_CHUNKS chunk per jalan."""
+    global LAST_LOG_MAINTENANCE
+
+    now = time.monotonic()
+    if LAST_LOG_MAINTENANCE is not None and now - LAST_LOG_MAINTENANCE < LOG_MAINTENANCE_INTERVAL:
+        return
+    LAST_LOG_MAINTENANCE = now
+
+    mysql_conn = connect_mysql()
+    try:
+        total = compact_log(
+            mysql_conn, MYSQL_LOG, LOG_RETENTION_DAYS,
+            archive_table=LOG_ARCHIVE_TABLE, max_chunks=LOG_COMPACT_MAX_CHUNKS
+        )
+        if total:
+            print(f"Retensi log: {total} baris lebih tua dari {LOG_RETENTION_DAYS} hari dibersihkan.")
+    finally:
+        mysql_conn.close()
+
+# === Dry-run / explain ===
+# perkiraan kasar panjang teks satu statement SQL yang dikirim ke server
+SQL_TEXT_BYTES_ESTIMATE = 200
+
+def _param_bytes(values):
+    return sum(len(str(v)) for v in values if v is not None)
+
+def estimate_batch_cost(plan, batch_size):
+    """Perkiraan round trip & byte jika entri diproses per batch berukuran batch_size."""
+    round_trips = 1  # poll log PENDING
+    bytes_sent = 0
+    items = plan["items"]
+    for i in range(0, len(items), batch_size):
+        batch = items[i:i + batch_size]
+        # baca: COUNTER_DONE, row MySQL, row SQL Server (satu query per batch masing-masing)
+        round_trips += 3
+        groups = set()
+        for item in batch:
+            if item["kind"] == "UPDATE":
+                groups.add(("UPDATE", item["columns"]))
+            elif item["kind"] in ("INSERT", "DELETE"):
+                groups.add((item["kind"], None))
+            bytes_sent += item["bytes"]
+        statements = len(groups)
+        # tulis: satu executemany per grup kolom + commit, lalu update log + commit
+        round_trips += statements + 1 + 2
+        bytes_sent += (statements + 1) * SQL_TEXT_BYTES_ESTIMATE
+    return round_trips, bytes_sent
+
+def explain_sync_data_timbang():
+    """Hitung rencana perubahan dari log PENDING tanpa menulis apa pun."""
+    sqlsrv_conn = connect_sqlserver()
+    sqlsrv_cur = PROFILER.wrap_cursor(sqlsrv_conn.cursor())
+    mysql_conn = connect_mysql()
+    mysql_cur = PROFILER.wrap_cursor(mysql_conn.cursor(dictionary=True))
+
+    plan = {"items": [], "counts": {}, "update_sets": {}}
+    # round trip & byte jalur per baris yang sekarang
+    round_trips = 1
+    bytes_sent = 0
+
+    try:
+        mysql_cur.execute(f"SELECT NOURUT1, AKSI, PLANT_ID FROM {MYSQL_LOG} WHERE STATUS = 'PENDING' ORDER BY LOG_TIME, NOURUT1, PLANT_ID")
+        logs = mysql_cur.fetchall()
+
+        for entry in logs:
+            NOURUT1 = entry.get('NOURUT1')
+            PLANT_ID = entry.get('PLANT_ID')
+            aksi = (entry.get('AKSI') or 'UPDATE').upper()
+            item = {"kind": None, "columns": None, "bytes": 0}
+            round_trips += 1  # SELECT COUNTER_DONE
+
+            if aksi in ('INSERT', 'UPDATE'):
+                mysql_cur.execute(
+                    f"SELECT * FROM {MYSQL_TABLE} WHERE NOURUT1 = %s AND PLANT_ID = %s",
+                    (NOURUT1, PLANT_ID)
+                )
+                row = mysql_cur.fetchone()
+                round_trips += 1
+                if not row:
+                    item["kind"] = "MISSING"
+                    round_trips += 2
+                else:
+                    add_derived_columns(row)
+                    col_names = list(row.keys())
+                    lookup_sql, old_index = target_lookup_sql(col_names)
+                    sqlsrv_cur.execute(lookup_sql, (NOURUT1, PLANT_ID))
+                    old_row = sqlsrv_cur.fetchone()
+                    round_trips += 1
+                    if old_row is None:
+                        item["kind"] = "INSERT"
+                        item["bytes"] = _param_bytes(row.values())
+                        round_trips += 4
+                    else:
+                        changed_cols = find_changed_columns(row, old_row, old_index, col_names)
+                        if changed_cols:
+                            item["kind"] = "UPDATE"
+                            item["columns"] = tuple(changed_cols)
+                            item["bytes"] = _param_bytes(row[c] for c in changed_cols)
+                            round_trips += 4
+                        else:
+                            item["kind"] = "NOOP"
+                            round_trips += 2
+            elif aksi == 'DELETE':
+                # lookup yang sama dengan target; flag yang sudah 1 / baris yang tidak ada tidak mengubah apa pun
+                sqlsrv_cur.execute(
+                    f"SELECT [DELETED] FROM {SQLSRV_TABLE} WHERE NOURUT1 = ? AND PLANT_ID = ?",
+                    (NOURUT1, PLANT_ID)
+                )
+                old_row = sqlsrv_cur.fetchone()
+                if old_row is None:
+                    item["kind"] = "DELETE_MISSING"
+                elif old_row[0] == 1:
+                    item["kind"] = "DELETE_NOOP"
+                else:
+                    item["kind"] = "DELETE"
+                item["bytes"] = _param_bytes((NOURUT1, PLANT_ID))
+                # apply_log_entry tetap mengirim UPDATE flag + update log untuk semua DELETE
+                round_trips += 4
+            else:
+                item["kind"] = "UNKNOWN"
+                round_trips += 2
+
+            # per baris: teks SQL ikut terkirim di setiap statement
+            bytes_sent += item["bytes"] + SQL_TEXT_BYTES_ESTIMATE
+            plan["items"].append(item)
+            plan["counts"][item["kind"]] = plan["counts"].get(item["kind"], 0) + 1
+            if item["columns"]:
+                plan["update_sets"][item["columns"]] = plan["update_sets"].get(item["columns"], 0) + 1
+
+    finally:
+        try:
+            mysql_cur.close()
+            mysql_conn.close()
+        except:
+            pass
+        try:
+            sqlsrv_cur.close()
+            sqlsrv_conn.close()
+        except:
+            pass
+
+    print(f"=== [DRY RUN] {len(plan['items'])} log PENDING, tidak ada data yang ditulis ===")
+    for kind in ("INSERT", "UPDATE", "DELETE", "DELETE_NOOP", "DELETE_MISSING", "NOOP", "MISSING", "UNKNOWN"):
+        print(f"  {kind}: {plan['counts'].get(kind, 0)}")
+    for columns, jumlah in sorted(plan["update_sets"].items(), key=lambda x: -x[1]):
+        print(f"  UPDATE parsial [{', '.join(columns)}]: {jumlah}")
+    print(f"  Jalur per baris sekarang: ~{round_trips} round trip, ~{bytes_sent} byte")
+    for batch_size in DRY_RUN_BATCH_SIZES:
+        rt, b = estimate_batch_cost(plan, batch_size)
+        print(f"  Batch {batch_size}: ~{rt} round trip, ~{b} byte")
+    return plan
+
+# === Startup report ===
+def report_import_times():
+    """Catat lama import tiap modul berat (IMPORT_REPORT=1 atau --import-report)."""
+    import importlib
+
+    for name in HEAVY_MODULES:
+        already = name in sys.modules
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"Import {name} gagal: {e}")
+            continue
+        ms = (time.perf_counter() - start) * 1000
+        print(f"Import {name}: {ms:.0f} ms{' (sudah dimuat)' if already else ''}")
+
+# Build PyInstaller baru menjalankan main.py setelah bootloader selesai (onefile:
+# ekstrak ke _MEIPASS di proses induk). STARTUP_T0 tidak melihat waktu itu, jadi
+# untuk build frozen dihitung dari waktu proses exe dibuat lewat psutil (opsional).
+FROZEN_LAUNCH_OFFSET_MS = None
+FROZEN_LAUNCH_CHECKED = False
+
+def frozen_launch_offset_ms():
+    """Selisih ms dari exe dijalankan sampai STARTUP_T0, atau None jika tidak terukur."""
+    global FROZEN_LAUNCH_OFFSET_MS, FROZEN_LAUNCH_CHECKED
+    if FROZEN_LAUNCH_CHECKED:
+        return FROZEN_LAUNCH_OFFSET_MS
+    FROZEN_LAUNCH_CHECKED = True
+    try:
+        import psutil
+        proc = psutil.Process()
+        launch = proc.create_time()
+        parent = proc.parent()
+        # onefile: proses induk adalah bootloader dengan exe yang sama
+        if hasattr(sys, "_MEIPASS") and parent is not None:
+            try:
+                if os.path.normcase(parent.exe()) == os.path.normcase(sys.executable):
+                    launch = parent.create_time()
+            except psutil.Error:
+                pass
+        FROZEN_LAUNCH_OFFSET_MS = max(0.0, (STARTUP_WALL_T0 - launch) * 1000)
+    except Exception as e:
+        print(f"⚠️ Waktu unpack bootloader tidak terukur (psutil tidak tersedia: {e}); startup dihitung sejak main.py dimulai")
+    return FROZEN_LAUNCH_OFFSET_MS
+
+def report_startup(stage):
+    ms = (time.perf_counter() - STARTUP_T0) * 1000
+    if getattr(sys, "frozen", False):
+        offset = frozen_launch_offset_ms()
+        if offset is None:
+            print(f"Startup (frozen, tanpa unpack bootloader) {stage}: {ms:.0f} ms")
+        else:
+            ms += offset
+            print(f"Startup (frozen, sejak exe dijalankan; bootloader {offset:.0f} ms) {stage}: {ms:.0f} ms")
+    else:
+        print(f"Startup {stage}: {ms:.0f} ms")
+    return ms
+
+def check_startup_budget(stage):
+    if report_startup(stage) > STARTUP_BUDGET_MS:
+        print(f"⚠️ Startup melebihi budget {STARTUP_BUDGET_MS} ms")
 
 # === Main loop ===
 if __name__ == "__main__":
+    if CREATE_TARGET_INDEX:
+        ensure_target_index(create=True)
+        sys.exit(0)
+
+    if DRY_RUN:
+        explain_sync_data_timbang()
+        sys.exit(0)
+
     threading.Thread(target=send_heartbeat, args=(PC_NAME,), daemon=True).start()
+
+    report_startup("siap sebelum siklus pertama")
+    if IMPORT_REPORT:
+        report_import_times()
+
+    if PROFILE_CYCLES > 0:
+        PROFILER.request(PROFILE_CYCLES)
+    install_signal_trigger(PROFILER, PROFILE_SIGNAL_CYCLES)
+    if PROFILE_CONTROL_PORT:
+        start_control_server(PROFILER, PROFILE_CONTROL_PORT, PROFILE_SIGNAL_CYCLES)
+
+    if TARGET_INDEX_CHECK:
+        try:
+            ensure_target_index()
+        except Exception as e:
+            print(f"Gagal cek index SQL Server: {e}")
     
     while True:
+        PROFILER.start_cycle()
         try:
             sync_data_timbang()
+            if RETRY_ENABLED:
+                retry_failed_entries()
             sync_data_timbang_log()
+            if LOG_RETENTION_DAYS > 0:
+                maintain_timbang_log()
+            if APPLY_BATCH_SIZE > 1 and OFFSET_RETENTION_DAYS > 0:
+                prune_applied_offsets()
             
              # reset error jika sudah normal
             if LAST_MAIN_ERROR_NORMALIZED is not None:
@@ -468,10 +1442,16 @@ if __name__ == "__main__":
         except Exception as e:
             raw_err = str(e)
             norm_err = normalize_error_exception_utama(raw_err)
+            SYNC_STATS.record_main_error()
 
             # hanya cetak error baru
             if norm_err != LAST_MAIN_ERROR_NORMALIZED:
                 print(f"Terjadi Error Utama: {raw_err}")
                 LAST_MAIN_ERROR_NORMALIZED = norm_err
+
+        try:
+            PROFILER.end_cycle()
+        except Exception as e:
+            print(f"Gagal menyimpan hasil profiling: {e}")
                 
         time.sleep(SYNC_INTERVAL)
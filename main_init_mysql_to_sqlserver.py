@@ -4,6 +4,8 @@ import time
 import datetime
 import mysql.connector
 import pyodbc
+from transform import get_shift_dates, RowBatch
+from bulk_load import BulkLoader
 
 load_dotenv()
 
@@ -25,21 +27,14 @@ MYSQL_TABLE = os.getenv("MYSQL_TABLE")
 SQLSRV_TABLE = os.getenv("SQLSRV_TABLE")
 WB_TAG = os.getenv("WB_TAG")
 
-def get_shift_date(dt):
-    if not dt:
-        return None
-    try:
-        trim_date = dt.date()
-        trim_time = dt.time()
-        if datetime.time(7, 0, 0) <= trim_time <= datetime.time(18, 59, 59):
-            return datetime.datetime.combine(trim_date, datetime.time(0, 0, 1))
-        elif datetime.time(19, 0, 0) <= trim_time <= datetime.time(23, 59, 59):
-            return datetime.datetime.combine(trim_date, datetime.time(0, 0, 2))
-        else:
-            return datetime.datetime.combine(trim_date - datetime.timedelta(days=1), datetime.time(0, 0, 2))
-    except Exception as e:
-        print("Error get_shift_date:", e)
-        return None
+# === Mode initial load ===
+# executemany : INSERT berparameter (fast_executemany)
+# bulk        : file CSV + BULK INSERT, otomatis kembali ke executemany jika tidak bisa
+INITIAL_LOAD_MODE = os.getenv("INITIAL_LOAD_MODE", "executemany").lower()
+INITIAL_CHUNK_SIZE = int(os.getenv("INITIAL_CHUNK_SIZE", 50000))
+BULK_SHARE_DIR = os.getenv("BULK_SHARE_DIR")
+BULK_SHARE_DIR_SERVER = os.getenv("BULK_SHARE_DIR_SERVER")
+BULK_TABLOCK = os.getenv("BULK_TABLOCK", "1") == "1"
 
 def initial_sync():
     print("=== [Initial Sync] Pemeriksaan awal... ===")
@@ -56,7 +51,7 @@ def initial_sync():
     sqlsrv_cur.fast_executemany = True  # 🚀 aktifkan mode cepat
 
     mysql_conn = mysql.connector.connect(**MYSQL_CONN)
-    mysql_cur = mysql_conn.cursor(dictionary=True)
+    mysql_cur = mysql_conn.cursor()
 
     try:
         sqlsrv_cur.execute(f"SELECT COUNT(*) FROM {SQLSRV_TABLE} WHERE wb_tag = ?", (WB_TAG,))
@@ -66,34 +61,50 @@ def initial_sync():
             print(f"❌ Data dengan WB_TAG={WB_TAG} sudah ada di tabel {SQLSRV_TABLE} ({count_sqlsrv} baris).")
             return
 
-        mysql_cur.execute(f"SELECT * FROM {MYSQL_TABLE}")
-        rows = mysql_cur.fetchall()
-        total_rows = len(rows)
+        mysql_cur.execute(f"SELECT COUNT(*) AS total FROM {MYSQL_TABLE}")
+        total_rows = mysql_cur.fetchall()[0][0]
         if total_rows == 0:
             print("⚠️ Tidak ada data untuk disalin.")
             return
 
-        print(f"Menyalin {total_rows} baris dari MySQL ke SQL Server...")
-        
-        batch_data = []
-        for row in rows:
-            tanggal_shift = get_shift_date(row.get("TANGGAL2"))
-            row["tanggal_shift"] = tanggal_shift
-            row["date_sync"] = datetime.datetime.now()
-            row["wb_tag"] = WB_TAG
-            row["deleted"] = 0
-            batch_data.append(row)
-
-        col_names = list(batch_data[0].keys())
-        col_list_sql = ", ".join(f"[{c}]" for c in col_names)
-        placeholders = ", ".join("?" for _ in col_names)
-        insert_sql = f"INSERT INTO {SQLSRV_TABLE} ({col_list_sql}) VALUES ({placeholders})"
-
-        params_list = [[row[c] for c in col_names] for row in batch_data]
-        sqlsrv_cur.executemany(insert_sql, params_list)
+        print(f"Menyalin {total_rows} baris dari MySQL ke SQL Server (mode {INITIAL_LOAD_MODE})...")
+
+        loader = None
+        if INITIAL_LOAD_MODE == "bulk":
+            loader = BulkLoader(sqlsrv_conn, SQLSRV_TABLE, BULK_SHARE_DIR, BULK_SHARE_DIR_SERVER, BULK_TABLOCK)
+
+        mysql_cur.execute(f"SELECT * FROM {MYSQL_TABLE}")
+        insert_sql = None
+        copied = 0
+        while True:
+            rows = mysql_cur.fetchmany(INITIAL_CHUNK_SIZE)
+            if not rows:
+                break
+
+            # baris tuple + satu indeks kolom; kolom buatan disimpan terpisah dan digabung sekali di batch.rows
+            batch = RowBatch(mysql_cur.column_names, rows)
+            batch.add_column("tanggal_shift", get_shift_dates(batch.column("TANGGAL2")))
+            batch.add_constant("date_sync", datetime.datetime.now())
+            batch.add_constant("wb_tag", WB_TAG)
+            batch.add_constant("deleted", 0)
+
+            if insert_sql is None:
+                col_names = batch.columns
+                col_list_sql = ", ".join(f"[{c}]" for c in col_names)
+                placeholders = ", ".join("?" for _ in col_names)
+                insert_sql = f"INSERT INTO {SQLSRV_TABLE} ({col_list_sql}) VALUES ({placeholders})"
+
+            if loader is None or not loader.load(col_names, batch.rows):
+                sqlsrv_cur.executemany(insert_sql, batch.rows)
+
+            copied += len(batch)
+            print(f"  {copied}/{total_rows} baris diproses...")
+
         sqlsrv_conn.commit()
 
-        print(f"✅ Selesai! Total {total_rows} baris disalin ke SQL Server.")
+        if loader is not None:
+            print(f"BULK INSERT: {loader.rows_bulk} baris, executemany: {copied - loader.rows_bulk} baris.")
+        print(f"✅ Selesai! Total {copied} baris disalin ke SQL Server.")
     except Exception as e:
         print(f"❌ Error fatal: {e}")
         sqlsrv_conn.rollback()
@@ -0,0 +1,57 @@
+# === Offset apply per entri di SQL Server (lihat applied_offsets.sql) ===
+# Setiap entri log yang diterapkan lewat batch dicatat dengan key
+# (WB_TAG, NOURUT1, PLANT_ID, CHANGE_SEQ). CHANGE_SEQ naik di setiap tulisan
+# trigger, jadi key yang sama berarti versi log yang sama, tidak bergantung
+# pada isi atau urutan batch.
+
+RESULT_CODES = {"SUCCESS": "S", "NOOP": "N"}
+
+# SQL Server membatasi 2100 parameter per statement; lookup memakai 3 per entri
+OFFSET_LOOKUP_CHUNK = 500
+
+
+def offset_key(entry):
+    """Key offset (NOURUT1, PLANT_ID, CHANGE_SEQ) untuk satu entri log.
+
+    NOURUT1 dan PLANT_ID dijadikan teks karena kolomnya NVARCHAR di tabel
+    offset; hasil dari MySQL (int) dan dari SQL Server (str) jadi sama.
+    """
+    return (str(entry.get('NOURUT1')), str(entry.get('PLANT_ID')), int(entry.get('CHANGE_SEQ')))
+
+
+def applied_lookup_sql(table, count):
+    """SELECT offset untuk `count` entri sekaligus (parameter dari applied_lookup_params)."""
+    cond = " OR ".join(["(NOURUT1 = ? AND PLANT_ID = ? AND CHANGE_SEQ = ?)"] * count)
+    return f"SELECT NOURUT1, PLANT_ID, CHANGE_SEQ, RESULT FROM {table} WHERE WB_TAG = ? AND ({cond})"
+
+
+def applied_lookup_params(wb_tag, entries):
+    params = [wb_tag]
+    for entry in entries:
+        params.extend(offset_key(entry))
+    return params
+
+
+def split_applied(entries, applied_rows):
+    """Pisahkan entri yang sudah punya offset dari yang belum.
+
+    Mengembalikan (done, todo): done berisi (entri, kode hasil) untuk entri
+    yang sudah diterapkan, todo entri yang belum; urutan entri dipertahankan.
+    """
+    applied = {offset_key({'NOURUT1': n, 'PLANT_ID': p, 'CHANGE_SEQ': s}): code for n, p, s, code in applied_rows}
+    done, todo = [], []
+    for entry in entries:
+        code = applied.get(offset_key(entry))
+        if code is None:
+            todo.append(entry)
+        else:
+            done.append((entry, code))
+    return done, todo
+
+
+def offset_rows(wb_tag, entries, results, pc_name):
+    """Baris INSERT offset untuk entri yang baru diterapkan (hasil SUCCESS/NOOP)."""
+    return [
+        (wb_tag, *offset_key(entry), entry.get('LOG_TIME'), RESULT_CODES[result], pc_name)
+        for entry, (result, _) in zip(entries, results)
+    ]
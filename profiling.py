@@ -0,0 +1,190 @@
+import datetime
+import heapq
+import io
+import os
+import re
+import signal
+import threading
+import time
+
+RE_WHITESPACE = re.compile(r"\s+")
+
+
+def param_shape(params):
+    """Bentuk parameter tanpa nilainya: tipe (dan panjang untuk str/bytes)."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {k: param_shape(v) for k, v in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [_value_shape(v) for v in params]
+    return _value_shape(params)
+
+
+def _value_shape(value):
+    if isinstance(value, (str, bytes, bytearray)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+class TimedCursor:
+    """Pembungkus cursor yang mencatat durasi setiap execute/executemany."""
+
+    def __init__(self, cursor, profiler):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_profiler", profiler)
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            if params is None:
+                return self._cursor.execute(sql, *args, **kwargs)
+            return self._cursor.execute(sql, params, *args, **kwargs)
+        finally:
+            self._profiler.record_query(sql, param_shape(params), time.perf_counter() - start)
+
+    def executemany(self, sql, seq_params, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, seq_params, *args, **kwargs)
+        finally:
+            first = seq_params[0] if seq_params else None
+            shape = {"rows": len(seq_params), "row": param_shape(first)}
+            self._profiler.record_query(sql, shape, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class SyncProfiler:
+    """Profiling on-demand untuk N siklus sync berikutnya.
+
+    cProfile hanya merekam thread yang menjalankan siklus (thread utama);
+    durasi query dicatat dari semua thread lewat TimedCursor.
+    """
+
+    def __init__(self, log_dir, slow_top=20):
+        self.log_dir = log_dir
+        self.slow_top = slow_top
+        # RLock: request() juga dipanggil dari signal handler di thread utama
+        self.lock = threading.RLock()
+        self.requested = 0
+        self.remaining = 0
+        self.profile = None
+        self.queries = {}
+        self.slowest = []
+
+    def request(self, cycles):
+        with self.lock:
+            self.requested = max(int(cycles), 1)
+        print(f"Profiling diminta untuk {self.requested} siklus berikutnya")
+
+    def start_cycle(self):
+        with self.lock:
+            if self.profile is None and self.requested:
+                import cProfile
+                self.remaining = self.requested
+                self.requested = 0
+                self.queries = {}
+                self.slowest = []
+                self.profile = cProfile.Profile()
+                self.profile.enable()
+
+    def end_cycle(self):
+        if self.profile is None:
+            return
+        self.remaining -= 1
+        if self.remaining > 0:
+            return
+        self.profile.disable()
+        try:
+            self.dump()
+        finally:
+            self.profile = None
+
+    def wrap_cursor(self, cursor):
+        return TimedCursor(cursor, self) if self.profile is not None else cursor
+
+    def record_query(self, sql, shape, elapsed):
+        text = RE_WHITESPACE.sub(" ", sql).strip()
+        with self.lock:
+            stat = self.queries.get(text)
+            if stat is None:
+                stat = self.queries[text] = {"count": 0, "total": 0.0, "max": 0.0}
+            stat["count"] += 1
+            stat["total"] += elapsed
+            stat["max"] = max(stat["max"], elapsed)
+
+            item = (elapsed, id(shape), text, shape)
+            if len(self.slowest) < self.slow_top:
+                heapq.heappush(self.slowest, item)
+            elif elapsed > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, item)
+
+    def dump(self):
+        import pstats
+        stamp = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+        base = os.path.join(self.log_dir, f"profile_{stamp}")
+        self.profile.dump_stats(f"{base}.pstats")
+
+        out = io.StringIO()
+        out.write("=== Fungsi (cumulative) ===\n")
+        pstats.Stats(self.profile, stream=out).sort_stats("cumulative").print_stats(50)
+
+        with self.lock:
+            queries = sorted(self.queries.items(), key=lambda x: -x[1]["total"])
+            slowest = sorted(self.slowest, reverse=True)
+
+        out.write("\n=== Query (total detik, jumlah, rata-rata ms, max ms) ===\n")
+        for text, stat in queries:
+            avg_ms = stat["total"] / stat["count"] * 1000
+            out.write(f"{stat['total']:.3f}s  x{stat['count']}  avg {avg_ms:.1f}ms  max {stat['max'] * 1000:.1f}ms  {text}\n")
+
+        out.write("\n=== Statement paling lambat ===\n")
+        for elapsed, _, text, shape in slowest:
+            out.write(f"{elapsed * 1000:.1f}ms  params={shape}  {text}\n")
+
+        with open(f"{base}.txt", "w", encoding="utf-8") as f:
+            f.write(out.getvalue())
+        print(f"Hasil profiling disimpan: {base}.txt / {base}.pstats")
+
+
+def install_signal_trigger(profiler, cycles):
+    """SIGUSR1 (Linux) atau SIGBREAK/Ctrl+Break (Windows) menyalakan profiling."""
+    signum = getattr(signal, "SIGUSR1", None) or getattr(signal, "SIGBREAK", None)
+    if signum is None:
+        return None
+    signal.signal(signum, lambda *_: profiler.request(cycles))
+    return signum
+
+
+def start_control_server(profiler, port, cycles):
+    """Endpoint lokal: GET http://127.0.0.1:<port>/profile?cycles=N"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/profile":
+                self.send_response(404)
+                self.end_headers()
+                return
+            n = int(parse_qs(url.query).get("cycles", [cycles])[0])
+            profiler.request(n)
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(f"profiling {n} siklus\n".encode())
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,55 @@
+-- Kolom antrean retry untuk main.py (RETRY_ENABLED=1)
+-- RETRY_COUNT   : jumlah percobaan ulang yang sudah dilakukan
+-- NEXT_RETRY_AT : waktu paling cepat entri FAILED boleh dicoba lagi (NULL = tidak di-retry)
+-- STATUS 'DEAD' : entri yang percobaannya habis (dead-letter), tidak disentuh lagi oleh daemon
+--                 sampai ada perubahan baru pada key itu (trigger mengembalikannya ke PENDING)
+
+ALTER TABLE tb_timbang2_log
+    ADD COLUMN RETRY_COUNT INT NOT NULL DEFAULT 0,
+    ADD COLUMN NEXT_RETRY_AT DATETIME NULL,
+    ADD INDEX idx_tb_timbang2_log_retry (STATUS, NEXT_RETRY_AT);
+
+-- Trigger: perubahan baru pada key yang barisnya FAILED/DEAD (COUNTER_DONE = 0)
+-- mengembalikannya ke PENDING dan mereset hitungan retry. Kombinasi dengan
+-- ROW_IMAGE / CHANGE_SEQ: generate dengan python row_image.py [--no-image]
+
+DROP TRIGGER IF EXISTS tb_timbang2_after_insert;
+
+CREATE TRIGGER tb_timbang2_after_insert
+AFTER INSERT ON tb_timbang2
+FOR EACH ROW
+BEGIN
+    INSERT INTO tb_timbang2_log (NOURUT1, PLANT_ID, AKSI, LOG_TIME)
+    VALUES (NEW.NOURUT1, NEW.PLANT_ID, 'INSERT', NOW())
+    ON DUPLICATE KEY UPDATE AKSI='INSERT', LOG_TIME=NOW(), STATUS='PENDING', RETRY_COUNT=0, NEXT_RETRY_AT=NULL;
+END
+
+
+DROP TRIGGER IF EXISTS tb_timbang2_after_update;
+
+CREATE TRIGGER tb_timbang2_after_update
+AFTER UPDATE ON tb_timbang2
+FOR EACH ROW
+BEGIN
+    INSERT INTO tb_timbang2_log (NOURUT1, PLANT_ID, AKSI, LOG_TIME)
+    VALUES (NEW.NOURUT1, NEW.PLANT_ID, 'UPDATE', NOW())
+    ON DUPLICATE KEY UPDATE AKSI='UPDATE', LOG_TIME=NOW(), STATUS='PENDING', RETRY_COUNT=0, NEXT_RETRY_AT=NULL;
+END
+
+
+DROP TRIGGER IF EXISTS tb_timbang2_after_delete;
+
+CREATE TRIGGER tb_timbang2_after_delete
+AFTER DELETE ON tb_timbang2
+FOR EACH ROW
+BEGIN
+    INSERT INTO tb_timbang2_log (NOURUT1, PLANT_ID, AKSI, LOG_TIME)
+    VALUES (OLD.NOURUT1, OLD.PLANT_ID, 'DELETE', NOW())
+    ON DUPLICATE KEY UPDATE AKSI='DELETE', LOG_TIME=NOW(), STATUS='PENDING', RETRY_COUNT=0, NEXT_RETRY_AT=NULL;
+END
+
+-- Lihat isi dead-letter:
+-- SELECT NOURUT1, PLANT_ID, AKSI, RETRY_COUNT, MESSAGE FROM tb_timbang2_log WHERE STATUS = 'DEAD';
+
+-- Kembalikan entri DEAD ke antrean retry setelah penyebabnya diperbaiki:
+-- UPDATE tb_timbang2_log SET STATUS = 'FAILED', RETRY_COUNT = 0, NEXT_RETRY_AT = NOW() WHERE STATUS = 'DEAD';
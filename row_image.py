@@ -0,0 +1,178 @@
+import datetime
+import decimal
+import json
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MYSQL_CONN = {
+    'host': os.getenv("MYSQL_HOST"),
+    'user': os.getenv("MYSQL_USER"),
+    'password': os.getenv("MYSQL_PASS"),
+    'database': os.getenv("MYSQL_DB")
+}
+
+MYSQL_TABLE = os.getenv("MYSQL_TABLE")
+MYSQL_LOG = os.getenv("MYSQL_TABLE_LOG")
+
+# tipe kolom yang bisa dikembalikan persis seperti hasil SELECT mysql.connector
+INT_TYPES = ("tinyint", "smallint", "mediumint", "int", "integer", "bigint", "year")
+FLOAT_TYPES = ("float", "double", "real")
+TEXT_TYPES = ("char", "varchar", "tinytext", "text", "mediumtext", "longtext", "enum")
+
+
+def load_column_types(mysql_cur, table):
+    """Daftar (kolom, tipe, scale) sesuai urutan kolom tabel."""
+    mysql_cur.execute(
+        "SELECT COLUMN_NAME, DATA_TYPE, NUMERIC_SCALE FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION",
+        (table,)
+    )
+    result = []
+    for r in mysql_cur.fetchall():
+        if isinstance(r, dict):
+            r = (r["COLUMN_NAME"], r["DATA_TYPE"], r["NUMERIC_SCALE"])
+        data_type = r[1].decode() if isinstance(r[1], (bytes, bytearray)) else r[1]
+        result.append((r[0], data_type.lower(), r[2]))
+    return result
+
+
+def _parse_time(text):
+    negatif = text.startswith("-")
+    jam, menit, detik = text.lstrip("-").split(":")
+    delta = datetime.timedelta(hours=int(jam), minutes=int(menit), seconds=float(detik))
+    return -delta if negatif else delta
+
+
+def _decode_value(value, data_type, scale):
+    if value is None:
+        return None
+    if data_type in INT_TYPES:
+        return int(value)
+    if data_type in ("decimal", "numeric"):
+        value = decimal.Decimal(str(value))
+        return value.quantize(decimal.Decimal(1).scaleb(-scale)) if scale else value
+    if data_type in FLOAT_TYPES:
+        return float(value)
+    if data_type in ("datetime", "timestamp"):
+        return datetime.datetime.fromisoformat(value)
+    if data_type == "date":
+        return datetime.date.fromisoformat(value)
+    if data_type == "time":
+        return _parse_time(value)
+    if data_type in TEXT_TYPES:
+        return str(value)
+    raise ValueError(f"tipe {data_type} tidak didukung row image")
+
+
+def decode_row_image(payload, column_types):
+    """Ubah ROW_IMAGE (JSON dari trigger) menjadi dict seperti cursor(dictionary=True).
+
+    Mengembalikan None jika payload tidak lengkap atau berisi tipe yang
+    tidak didukung, supaya pemanggil kembali membaca MYSQL_TABLE.
+    """
+    if payload is None:
+        return None
+    if isinstance(payload, (bytes, bytearray)):
+        payload = payload.decode("utf-8")
+    try:
+        data = json.loads(payload, parse_float=decimal.Decimal) if isinstance(payload, str) else payload
+        row = {}
+        for name, data_type, scale in column_types:
+            if name not in data:
+                return None
+            row[name] = _decode_value(data[name], data_type, scale)
+        return row
+    except (ValueError, TypeError, ArithmeticError):
+        return None
+
+
+def build_log_triggers(table, log_table, image_columns=None, change_seq=False, retry=False):
+    """DDL trigger tabel log untuk kombinasi kolom opsional yang dipakai main.py.
+
+    image_columns : kolom yang disimpan ke ROW_IMAGE (None = tanpa row image)
+    change_seq    : isi CHANGE_SEQ (lihat applied_offsets.sql)
+    retry         : reset RETRY_COUNT/NEXT_RETRY_AT (lihat retry_queue.sql)
+
+    Perubahan baru pada key yang barisnya masih COUNTER_DONE = 0 selalu
+    mengembalikan baris itu ke PENDING, termasuk jika sebelumnya FAILED/DEAD.
+    """
+    def trigger(aksi, event, ref, image):
+        cols = ["NOURUT1", "PLANT_ID", "AKSI", "LOG_TIME"]
+        vals = [f"{ref}.NOURUT1", f"{ref}.PLANT_ID", f"'{aksi}'", "NOW()"]
+        upd = [f"AKSI='{aksi}'", "LOG_TIME=NOW()", "STATUS='PENDING'"]
+        declare = ""
+        if image_columns is not None:
+            cols.append("ROW_IMAGE")
+            vals.append(image)
+            upd.append("ROW_IMAGE=VALUES(ROW_IMAGE)" if image != "NULL" else "ROW_IMAGE=NULL")
+        if change_seq:
+            declare = (
+                f"    DECLARE seq INT;\n"
+                f"    SELECT COALESCE(MAX(CHANGE_SEQ), 0) + 1 INTO seq FROM {log_table} "
+                f"WHERE NOURUT1 = {ref}.NOURUT1 AND PLANT_ID = {ref}.PLANT_ID;\n"
+            )
+            cols.append("CHANGE_SEQ")
+            vals.append("seq")
+            upd.append("CHANGE_SEQ=VALUES(CHANGE_SEQ)")
+        if retry:
+            upd += ["RETRY_COUNT=0", "NEXT_RETRY_AT=NULL"]
+        return (
+            f"DROP TRIGGER IF EXISTS {table}_after_{event};\n\n"
+            f"CREATE TRIGGER {table}_after_{event}\n"
+            f"AFTER {aksi} ON {table}\n"
+            f"FOR EACH ROW\n"
+            f"BEGIN\n"
+            f"{declare}"
+            f"    INSERT INTO {log_table} ({', '.join(cols)})\n"
+            f"    VALUES ({', '.join(vals)})\n"
+            f"    ON DUPLICATE KEY UPDATE {', '.join(upd)};\n"
+            f"END\n"
+        )
+
+    image = None
+    if image_columns is not None:
+        pairs = ", ".join(f"'{c}', NEW.{c}" for c in image_columns)
+        image = f"JSON_OBJECT({pairs})"
+
+    triggers = [
+        trigger("INSERT", "insert", "NEW", image),
+        trigger("UPDATE", "update", "NEW", image),
+        trigger("DELETE", "delete", "OLD", "NULL"),
+    ]
+    return "\n\n".join(triggers)
+
+
+def build_row_image_triggers(table, log_table, columns, change_seq=False, retry=False):
+    """DDL trigger yang ikut menyimpan isi baris (NEW) ke kolom ROW_IMAGE di tabel log."""
+    return build_log_triggers(table, log_table, columns, change_seq, retry)
+
+
+if __name__ == "__main__":
+    # cetak DDL trigger untuk kolom MYSQL_TABLE dan kolom opsional MYSQL_LOG saat ini
+    import argparse
+    import mysql.connector
+
+    parser = argparse.ArgumentParser(description=f"DDL trigger {MYSQL_TABLE} -> {MYSQL_LOG}")
+    parser.add_argument("--no-image", action="store_true", help="Tanpa kolom ROW_IMAGE")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(**MYSQL_CONN)
+    cur = conn.cursor()
+    try:
+        log_columns = [name for name, _, _ in load_column_types(cur, MYSQL_LOG)]
+        change_seq = "CHANGE_SEQ" in log_columns
+        retry = "RETRY_COUNT" in log_columns
+        image_columns = None
+        if not args.no_image:
+            column_types = load_column_types(cur, MYSQL_TABLE)
+            unsupported = [name for name, data_type, _ in column_types
+                           if data_type not in INT_TYPES + FLOAT_TYPES + TEXT_TYPES + ("decimal", "numeric", "datetime", "timestamp", "date", "time")]
+            if unsupported:
+                print(f"-- PERHATIAN: kolom {', '.join(unsupported)} tidak didukung; daemon akan membaca ulang {MYSQL_TABLE}.")
+            image_columns = [name for name, _, _ in column_types]
+        print(build_log_triggers(MYSQL_TABLE, MYSQL_LOG, image_columns, change_seq, retry))
+    finally:
+        cur.close()
+        conn.close()
@@ -0,0 +1,44 @@
+-- Trigger alternatif: ikut menyimpan isi baris (row image) ke tb_timbang2_log
+-- sehingga main.py (APPLY_FROM_ROW_IMAGE=1) tidak perlu SELECT ulang tb_timbang2.
+-- Daftar kolom di JSON_OBJECT harus sama dengan kolom tb_timbang2;
+-- generate versi lengkapnya dengan: python row_image.py
+-- Jika retry_queue.sql juga dipakai, generate dengan python row_image.py (ikut reset RETRY_COUNT/NEXT_RETRY_AT).
+-- ROW_IMAGE dikosongkan lagi oleh main.py saat entri selesai (SUCCESS / tidak ada perubahan).
+
+ALTER TABLE tb_timbang2_log ADD COLUMN ROW_IMAGE JSON NULL;
+
+
+DROP TRIGGER IF EXISTS tb_timbang2_after_insert;
+
+CREATE TRIGGER tb_timbang2_after_insert
+AFTER INSERT ON tb_timbang2
+FOR EACH ROW
+BEGIN
+    INSERT INTO tb_timbang2_log (NOURUT1, PLANT_ID, AKSI, LOG_TIME, ROW_IMAGE)
+    VALUES (NEW.NOURUT1, NEW.PLANT_ID, 'INSERT', NOW(), JSON_OBJECT('NOURUT1', NEW.NOURUT1, 'PLANT_ID', NEW.PLANT_ID, 'TANGGAL2', NEW.TANGGAL2 /* , ...kolom lain */))
+    ON DUPLICATE KEY UPDATE AKSI='INSERT', LOG_TIME=NOW(), STATUS='PENDING', ROW_IMAGE=VALUES(ROW_IMAGE);
+END
+
+
+DROP TRIGGER IF EXISTS tb_timbang2_after_update;
+
+CREATE TRIGGER tb_timbang2_after_update
+AFTER UPDATE ON tb_timbang2
+FOR EACH ROW
+BEGIN
+    INSERT INTO tb_timbang2_log (NOURUT1, PLANT_ID, AKSI, LOG_TIME, ROW_IMAGE)
+    VALUES (NEW.NOURUT1, NEW.PLANT_ID, 'UPDATE', NOW(), JSON_OBJECT('NOURUT1', NEW.NOURUT1, 'PLANT_ID', NEW.PLANT_ID, 'TANGGAL2', NEW.TANGGAL2 /* , ...kolom lain */))
+    ON DUPLICATE KEY UPDATE AKSI='UPDATE', LOG_TIME=NOW(), STATUS='PENDING', ROW_IMAGE=VALUES(ROW_IMAGE);
+END
+
+
+DROP TRIGGER IF EXISTS tb_timbang2_after_delete;
+
+CREATE TRIGGER tb_timbang2_after_delete
+AFTER DELETE ON tb_timbang2
+FOR EACH ROW
+BEGIN
+    INSERT INTO tb_timbang2_log (NOURUT1, PLANT_ID, AKSI, LOG_TIME, ROW_IMAGE)
+    VALUES (OLD.NOURUT1, OLD.PLANT_ID, 'DELETE', NOW(), NULL)
+    ON DUPLICATE KEY UPDATE AKSI='DELETE', LOG_TIME=NOW(), STATUS='PENDING', ROW_IMAGE=NULL;
+END
@@ -0,0 +1,276 @@
+import argparse
+import base64
+import datetime
+import decimal
+import hashlib
+import json
+import mmap
+import os
+import time
+import zlib
+from dotenv import load_dotenv
+from transform import get_shift_dates, RowBatch
+from bulk_load import BulkLoader
+
+load_dotenv()
+
+MYSQL_CONN = {
+    'host': os.getenv("MYSQL_HOST"),
+    'user': os.getenv("MYSQL_USER"),
+    'password': os.getenv("MYSQL_PASS"),
+    'database': os.getenv("MYSQL_DB")
+}
+
+SQLSERVER_CONN = {
+    'server': os.getenv("SQLSERVER_HOST"),
+    'database': os.getenv("SQLSERVER_DB"),
+    'username': os.getenv("SQLSERVER_USER"),
+    'password': os.getenv("SQLSERVER_PASS")
+}
+
+MYSQL_TABLE = os.getenv("MYSQL_TABLE")
+SQLSRV_TABLE = os.getenv("SQLSRV_TABLE")
+WB_TAG = os.getenv("WB_TAG")
+
+SNAPSHOT_CHUNK_SIZE = int(os.getenv("SNAPSHOT_CHUNK_SIZE", 100000))
+SNAPSHOT_COMPRESS_LEVEL = int(os.getenv("SNAPSHOT_COMPRESS_LEVEL", 6))
+BULK_SHARE_DIR = os.getenv("BULK_SHARE_DIR")
+BULK_SHARE_DIR_SERVER = os.getenv("BULK_SHARE_DIR_SERVER")
+
+SNAPSHOT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+
+# === Encoding kolom ===
+# Setiap chunk berisi data per kolom (columnar). Tipe non-JSON disimpan
+# dengan tag per kolom agar bisa dikembalikan ke tipe Python aslinya.
+
+def _column_type(values):
+    tipe = "raw"
+    for v in values:
+        if v is None:
+            continue
+        if isinstance(v, datetime.datetime):
+            t = "datetime"
+        elif isinstance(v, datetime.date):
+            t = "date"
+        elif isinstance(v, datetime.timedelta):
+            t = "timedelta"
+        elif isinstance(v, decimal.Decimal):
+            t = "decimal"
+        elif isinstance(v, (bytes, bytearray)):
+            t = "bytes"
+        else:
+            t = "raw"
+        if tipe != "raw" and t != tipe:
+            raise ValueError(f"Kolom berisi tipe campuran: {tipe} dan {t}")
+        tipe = t
+    return tipe
+
+
+def _encode_column(values, tipe):
+    if tipe == "datetime" or tipe == "date":
+        return [None if v is None else v.isoformat() for v in values]
+    if tipe == "timedelta":
+        return [None if v is None else [v.days, v.seconds, v.microseconds] for v in values]
+    if tipe == "decimal":
+        return [None if v is None else str(v) for v in values]
+    if tipe == "bytes":
+        return [None if v is None else base64.b64encode(v).decode("ascii") for v in values]
+    return values
+
+
+def _decode_column(values, tipe):
+    if tipe == "datetime":
+        return [None if v is None else datetime.datetime.fromisoformat(v) for v in values]
+    if tipe == "date":
+        return [None if v is None else datetime.date.fromisoformat(v) for v in values]
+    if tipe == "timedelta":
+        return [None if v is None else datetime.timedelta(days=v[0], seconds=v[1], microseconds=v[2]) for v in values]
+    if tipe == "decimal":
+        return [None if v is None else decimal.Decimal(v) for v in values]
+    if tipe == "bytes":
+        return [None if v is None else base64.b64decode(v) for v in values]
+    return values
+
+
+def encode_chunk(col_names, rows) -> bytes:
+    columns = [list(col) for col in zip(*rows)]
+    types = [_column_type(col) for col in columns]
+    payload = {
+        "columns": col_names,
+        "types": types,
+        "data": [_encode_column(col, t) for col, t in zip(columns, types)],
+    }
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return zlib.compress(raw, SNAPSHOT_COMPRESS_LEVEL)
+
+
+def decode_chunk(buffer):
+    payload = json.loads(zlib.decompress(buffer))
+    columns = [_decode_column(col, t) for col, t in zip(payload["data"], payload["types"])]
+    rows = [list(r) for r in zip(*columns)]
+    return payload["columns"], rows
+
+
+# === Koneksi (driver diimport saat dipakai, seperti main.py) ===
+
+def connect_mysql():
+    import mysql.connector
+    return mysql.connector.connect(**MYSQL_CONN)
+
+
+def connect_sqlserver():
+    import pyodbc
+    return pyodbc.connect(
+        f"DRIVER={{ODBC Driver 17 for SQL Server}};"
+        f"SERVER={SQLSERVER_CONN['server']};"
+        f"DATABASE={SQLSERVER_CONN['database']};"
+        f"UID={SQLSERVER_CONN['username']};"
+        f"PWD={SQLSERVER_CONN['password']}",
+        autocommit=False
+    )
+
+
+# === Export ===
+
+def export_snapshot(out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+
+    mysql_conn = connect_mysql()
+    mysql_cur = mysql_conn.cursor()
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "table": MYSQL_TABLE,
+        "wb_tag": WB_TAG,
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "columns": None,
+        "total_rows": 0,
+        "chunks": [],
+    }
+
+    try:
+        mysql_cur.execute(f"SELECT * FROM {MYSQL_TABLE} ORDER BY NOURUT1, PLANT_ID")
+        src_cols = list(mysql_cur.column_names)
+        idx_nourut1 = src_cols.index("NOURUT1")
+        idx_plant_id = src_cols.index("PLANT_ID")
+        manifest["columns"] = src_cols + ["tanggal_shift", "wb_tag", "deleted"]
+
+        nomor = 0
+        while True:
+            rows = mysql_cur.fetchmany(SNAPSHOT_CHUNK_SIZE)
+            if not rows:
+                break
+
+            nomor += 1
+            batch = RowBatch(src_cols, rows)
+            batch.add_column("tanggal_shift", get_shift_dates(batch.column("TANGGAL2")))
+            batch.add_constant("wb_tag", WB_TAG)
+            batch.add_constant("deleted", 0)
+            rows = batch.rows
+
+            data = encode_chunk(batch.columns, rows)
+            file_name = f"chunk_{nomor:05d}.bin"
+            with open(os.path.join(out_dir, file_name), "wb") as f:
+                f.write(data)
+
+            manifest["chunks"].append({
+                "file": file_name,
+                "rows": len(rows),
+                "bytes": len(data),
+                "sha256": hashlib.sha256(data).hexdigest(),
+                "first_key": [rows[0][idx_nourut1], rows[0][idx_plant_id]],
+                "last_key": [rows[-1][idx_nourut1], rows[-1][idx_plant_id]],
+            })
+            manifest["total_rows"] += len(rows)
+            print(f"  {file_name}: {len(rows)} baris, {len(data)} byte")
+
+        with open(os.path.join(out_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, default=str)
+
+        print(f"✅ Snapshot selesai: {manifest['total_rows']} baris dalam {len(manifest['chunks'])} chunk di {out_dir}")
+    finally:
+        mysql_cur.close()
+        mysql_conn.close()
+
+
+# === Import ===
+
+def read_chunk(path, sha256_expected):
+    """Baca chunk lewat mmap, verifikasi checksum, lalu decode."""
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            checksum = hashlib.sha256(mm).hexdigest()
+            if checksum != sha256_expected:
+                raise ValueError(f"Checksum {os.path.basename(path)} tidak cocok")
+            return decode_chunk(mm)
+
+
+def import_snapshot(in_dir):
+    with open(os.path.join(in_dir, MANIFEST_FILE), encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        print(f"❌ Versi snapshot {manifest.get('version')} tidak didukung.")
+        return
+
+    wb_tag = manifest.get("wb_tag")
+    print(f"Snapshot {manifest['table']} (WB_TAG={wb_tag}, {manifest['total_rows']} baris, dibuat {manifest['created_at']})")
+
+    sqlsrv_conn = connect_sqlserver()
+    sqlsrv_cur = sqlsrv_conn.cursor()
+    sqlsrv_cur.fast_executemany = True
+
+    try:
+        sqlsrv_cur.execute(f"SELECT COUNT(*) FROM {SQLSRV_TABLE} WHERE wb_tag = ?", (wb_tag,))
+        count_sqlsrv = sqlsrv_cur.fetchone()[0]
+        if count_sqlsrv > 0:
+            print(f"❌ Data dengan WB_TAG={wb_tag} sudah ada di tabel {SQLSRV_TABLE} ({count_sqlsrv} baris).")
+            return
+
+        col_names = manifest["columns"] + ["date_sync"]
+        col_list_sql = ", ".join(f"[{c}]" for c in col_names)
+        placeholders = ", ".join("?" for _ in col_names)
+        insert_sql = f"INSERT INTO {SQLSRV_TABLE} ({col_list_sql}) VALUES ({placeholders})"
+
+        loader = BulkLoader(sqlsrv_conn, SQLSRV_TABLE, BULK_SHARE_DIR, BULK_SHARE_DIR_SERVER)
+
+        imported = 0
+        for chunk in manifest["chunks"]:
+            chunk_cols, rows = read_chunk(os.path.join(in_dir, chunk["file"]), chunk["sha256"])
+            if chunk_cols != manifest["columns"] or len(rows) != chunk["rows"]:
+                raise ValueError(f"Isi {chunk['file']} tidak sesuai manifest")
+
+            date_sync = datetime.datetime.now()
+            for row in rows:
+                row.append(date_sync)
+
+            if not loader.load(col_names, rows):
+                sqlsrv_cur.executemany(insert_sql, rows)
+
+            imported += len(rows)
+            print(f"  {chunk['file']}: {imported}/{manifest['total_rows']} baris")
+
+        sqlsrv_conn.commit()
+        print(f"✅ Import selesai: {imported} baris (BULK INSERT: {loader.rows_bulk}).")
+    except Exception as e:
+        print(f"❌ Error fatal: {e}")
+        sqlsrv_conn.rollback()
+    finally:
+        sqlsrv_cur.close()
+        sqlsrv_conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshot offline MySQL → SQL Server untuk seeding station baru")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("folder", help="Folder snapshot (berisi manifest.json dan file chunk)")
+    args = parser.parse_args()
+
+    start = time.time()
+    if args.command == "export":
+        export_snapshot(args.folder)
+    else:
+        import_snapshot(args.folder)
+    print(f"⏱️ Durasi total: {round(time.time() - start)}s")
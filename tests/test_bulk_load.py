@@ -0,0 +1,72 @@
+import csv
+import datetime
+import decimal
+
+import pytest
+
+from bulk_load import BulkLoader, BulkValueError, format_bulk_value
+
+
+def _loader(tmp_path, table_columns):
+    loader = BulkLoader(None, "dbo.tb_timbang2", str(tmp_path))
+    loader.table_columns = table_columns
+    return loader
+
+
+def test_quoting_csv_dibaca_ulang_sama(tmp_path):
+    loader = _loader(tmp_path, [("A", "nvarchar"), ("B", "int")])
+    teks = ['biasa', 'koma, di tengah', 'kutip "ganda"', 'baris\nbaru', 'cr\r\nlf', ' spasi ']
+    local_path, server_path = loader._write_file(["A", "B"], [(t, i) for i, t in enumerate(teks)])
+
+    with open(local_path, encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows == [[t, str(i)] for i, t in enumerate(teks)]
+    assert server_path.endswith(local_path.rsplit("bulk_", 1)[1])
+
+
+def test_null_jadi_field_kosong(tmp_path):
+    loader = _loader(tmp_path, [("A", "nvarchar"), ("B", "datetime")])
+    local_path, _ = loader._write_file(["A", "B"], [(None, None)])
+    with open(local_path, encoding="utf-8", newline="") as f:
+        assert f.read() == ",\n"
+
+
+def test_string_kosong_ditolak():
+    # CSV + KEEPNULLS tidak bisa membedakan '' dengan NULL
+    with pytest.raises(BulkValueError):
+        format_bulk_value("", "nvarchar")
+
+
+def test_string_kosong_fallback_executemany(tmp_path):
+    loader = _loader(tmp_path, [("A", "nvarchar")])
+    assert loader.load(["A"], [("isi",), ("",)]) is False
+    assert loader.rows_fallback == 2
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("value, sql_type, expected", [
+    (True, "bit", "1"),
+    (False, "bit", "0"),
+    (42, "int", "42"),
+    (decimal.Decimal("1.50"), "decimal", "1.50"),
+    (decimal.Decimal("1E+3"), "decimal", "1000"),
+    (0.1, "decimal", "0.1"),
+    (0.1, "float", "0.1"),
+    (datetime.datetime(2024, 3, 1, 8, 0, 0, 123456), "datetime", "2024-03-01T08:00:00.123"),
+    (datetime.datetime(2024, 3, 1, 8, 0, 0, 123456), "datetime2", "2024-03-01T08:00:00.123456"),
+    (datetime.date(2024, 3, 1), "date", "2024-03-01"),
+    (datetime.time(7, 0), "time", "07:00:00"),
+    (b"\x00\xff", "varbinary", "00ff"),
+])
+def test_format_nilai(value, sql_type, expected):
+    assert format_bulk_value(value, sql_type) == expected
+
+
+@pytest.mark.parametrize("value, sql_type", [
+    (b"\x00", "nvarchar"),
+    (object(), "nvarchar"),
+    ([1, 2], "nvarchar"),
+])
+def test_tipe_tidak_didukung(value, sql_type):
+    with pytest.raises(BulkValueError):
+        format_bulk_value(value, sql_type)
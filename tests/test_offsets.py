@@ -0,0 +1,71 @@
+import datetime
+
+import pytest
+
+from offsets import (
+    OFFSET_LOOKUP_CHUNK, applied_lookup_params, applied_lookup_sql,
+    offset_key, offset_rows, split_applied,
+)
+
+LOG_TIME = datetime.datetime(2024, 3, 1, 8, 0, 0)
+
+
+def _entry(nourut1, plant_id, change_seq, aksi="UPDATE"):
+    return {"NOURUT1": nourut1, "PLANT_ID": plant_id, "AKSI": aksi, "LOG_TIME": LOG_TIME, "CHANGE_SEQ": change_seq}
+
+
+def test_key_stabil_antar_sumber():
+    # nilai dari poll MySQL dan dari tabel offset SQL Server (NVARCHAR) menghasilkan key sama
+    assert offset_key(_entry(1001, "P1", 3)) == offset_key({"NOURUT1": "1001", "PLANT_ID": "P1", "CHANGE_SEQ": "3"})
+    assert offset_key(_entry(1001, "P1", 3)) == ("1001", "P1", 3)
+
+
+def test_key_berbeda_per_versi_log():
+    # edit ulang di detik yang sama: LOG_TIME sama, CHANGE_SEQ beda
+    assert offset_key(_entry(1001, "P1", 3)) != offset_key(_entry(1001, "P1", 4))
+    assert offset_key(_entry(1001, "P1", 3)) != offset_key(_entry(1001, "P2", 3))
+
+
+def test_key_tidak_bergantung_isi_batch():
+    entries = [_entry(1, "P1", 1), _entry(2, "P1", 5), _entry(3, "P2", 2)]
+    applied_rows = [("2", "P1", 5, "S")]
+
+    for batch in (entries, list(reversed(entries)), entries[1:] + [_entry(9, "P1", 1)]):
+        done, todo = split_applied(batch, applied_rows)
+        assert [(e["NOURUT1"], code) for e, code in done] == [(2, "S")]
+        assert all(e["NOURUT1"] != 2 for e in todo)
+
+
+def test_split_mempertahankan_urutan():
+    entries = [_entry(n, "P1", 1) for n in range(6)]
+    done, todo = split_applied(entries, [("1", "P1", 1, "N"), ("4", "P1", 1, "S")])
+    assert [e["NOURUT1"] for e, _ in done] == [1, 4]
+    assert [code for _, code in done] == ["N", "S"]
+    assert [e["NOURUT1"] for e in todo] == [0, 2, 3, 5]
+
+
+def test_lookup_sql_dan_parameter():
+    entries = [_entry(1, "P1", 1), _entry(2, "P2", 7)]
+    sql = applied_lookup_sql("SYNC_APPLIED_OFFSETS", len(entries))
+    params = applied_lookup_params("WB01", entries)
+    assert sql.count("?") == len(params)
+    assert params == ["WB01", "1", "P1", 1, "2", "P2", 7]
+
+
+def test_lookup_chunk_di_bawah_batas_parameter():
+    # batas parameter SQL Server per statement
+    assert len(applied_lookup_params("WB01", [_entry(n, "P1", 1) for n in range(OFFSET_LOOKUP_CHUNK)])) <= 2100
+
+
+def test_offset_rows():
+    entries = [_entry(1, "P1", 1), _entry(2, "P1", 2)]
+    rows = offset_rows("WB01", entries, [("SUCCESS", 1), ("NOOP", 3)], "PC-1")
+    assert rows == [
+        ("WB01", "1", "P1", 1, LOG_TIME, "S", "PC-1"),
+        ("WB01", "2", "P1", 2, LOG_TIME, "N", "PC-1"),
+    ]
+
+
+def test_offset_rows_hanya_untuk_hasil_sukses():
+    with pytest.raises(KeyError):
+        offset_rows("WB01", [_entry(1, "P1", 1)], [("FAILED", 1)], "PC-1")
@@ -0,0 +1,100 @@
+import datetime
+import decimal
+import hashlib
+import json
+import os
+
+import pytest
+
+import snapshot
+from snapshot import decode_chunk, encode_chunk, read_chunk
+
+
+COLUMNS = ["NOURUT1", "PLANT_ID", "TANGGAL2", "TGL", "DURASI", "NETTO", "FOTO", "CATATAN", "JUMLAH", "RASIO"]
+ROWS = [
+    [1, "P1", datetime.datetime(2024, 3, 1, 8, 0, 0, 123456), datetime.date(2024, 3, 1),
+     datetime.timedelta(hours=1, seconds=5), decimal.Decimal("1234.50"), b"\x00\xff", "koma, \"kutip\"\n", 10, 0.5],
+    [2, "P1", None, None, None, None, None, None, None, None],
+    [3, "P2", datetime.datetime(2024, 3, 1, 23, 59, 59), datetime.date(2024, 2, 29),
+     datetime.timedelta(days=-1), decimal.Decimal("-0.001"), b"", "", 0, -1.25],
+]
+
+
+def test_chunk_round_trip():
+    col_names, rows = decode_chunk(encode_chunk(COLUMNS, ROWS))
+    assert col_names == COLUMNS
+    assert rows == ROWS
+
+
+def test_tipe_campuran_ditolak():
+    with pytest.raises(ValueError):
+        encode_chunk(["A"], [[datetime.date(2024, 3, 1)], [decimal.Decimal("1")]])
+
+
+def test_read_chunk_verifikasi_sha256(tmp_path):
+    data = encode_chunk(COLUMNS, ROWS)
+    path = tmp_path / "chunk_00001.bin"
+    path.write_bytes(data)
+
+    col_names, rows = read_chunk(str(path), hashlib.sha256(data).hexdigest())
+    assert (col_names, rows) == (COLUMNS, ROWS)
+
+    path.write_bytes(data[:-1] + bytes([data[-1] ^ 1]))
+    with pytest.raises(ValueError):
+        read_chunk(str(path), hashlib.sha256(data).hexdigest())
+
+
+class FakeCursor:
+    def __init__(self, columns, rows):
+        self.column_names = tuple(columns)
+        self.rows = [tuple(r) for r in rows]
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchmany(self, size):
+        chunk, self.rows = self.rows[:size], self.rows[size:]
+        return chunk
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def close(self):
+        pass
+
+
+def test_export_manifest_sha256(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "connect_mysql", lambda: FakeConnection(FakeCursor(COLUMNS, ROWS)))
+    monkeypatch.setattr(snapshot, "SNAPSHOT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(snapshot, "WB_TAG", "WB01")
+
+    snapshot.export_snapshot(str(tmp_path))
+
+    with open(tmp_path / snapshot.MANIFEST_FILE, encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["total_rows"] == len(ROWS)
+    assert [c["rows"] for c in manifest["chunks"]] == [2, 1]
+    assert manifest["columns"] == COLUMNS + ["tanggal_shift", "wb_tag", "deleted"]
+
+    exported = []
+    for chunk in manifest["chunks"]:
+        path = os.path.join(tmp_path, chunk["file"])
+        with open(path, "rb") as f:
+            assert hashlib.sha256(f.read()).hexdigest() == chunk["sha256"]
+        assert os.path.getsize(path) == chunk["bytes"]
+        col_names, rows = read_chunk(path, chunk["sha256"])
+        assert col_names == manifest["columns"]
+        exported.extend(rows)
+
+    assert [r[:len(COLUMNS)] for r in exported] == ROWS
+    assert [r[-2:] for r in exported] == [["WB01", 0]] * len(ROWS)
+    assert exported[0][len(COLUMNS)] == datetime.datetime(2024, 3, 1, 0, 0, 1)
+    assert exported[1][len(COLUMNS)] is None
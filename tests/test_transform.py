@@ -0,0 +1,57 @@
+import datetime
+
+from transform import get_shift_date, get_shift_dates
+
+
+def _values():
+    day = datetime.date(2024, 3, 1)
+    times = [
+        datetime.time(0, 0, 0),
+        datetime.time(6, 59, 59),
+        datetime.time(7, 0, 0),
+        datetime.time(12, 30, 0),
+        datetime.time(18, 59, 59),
+        datetime.time(18, 59, 59, 500000),
+        datetime.time(19, 0, 0),
+        datetime.time(23, 59, 59),
+        datetime.time(23, 59, 59, 999999),
+    ]
+    values = []
+    for offset in range(3):
+        for t in times:
+            values.append(datetime.datetime.combine(day + datetime.timedelta(days=offset), t))
+    # awal bulan/tahun: shift dini hari jatuh ke hari sebelumnya
+    values.append(datetime.datetime(2024, 1, 1, 3, 0, 0))
+    values.append(datetime.datetime(2024, 3, 1, 5, 0, 0))
+    values.extend([None, ""])
+    return values
+
+
+def test_batch_sama_dengan_per_baris():
+    values = _values()
+    assert get_shift_dates(values) == [get_shift_date(v) for v in values]
+
+
+def test_batch_urutan_acak_dan_hari_berulang():
+    values = list(reversed(_values())) * 2
+    assert get_shift_dates(values) == [get_shift_date(v) for v in values]
+
+
+def test_tipe_tak_terduga_ikut_per_baris():
+    values = [datetime.date(2024, 3, 1), "2024-03-01 08:00:00", 0]
+    assert get_shift_dates(values) == [get_shift_date(v) for v in values]
+
+
+def test_penanda_shift():
+    pagi, malam, dini_hari = get_shift_dates([
+        datetime.datetime(2024, 3, 2, 8, 0),
+        datetime.datetime(2024, 3, 2, 20, 0),
+        datetime.datetime(2024, 3, 2, 2, 0),
+    ])
+    assert pagi == datetime.datetime(2024, 3, 2, 0, 0, 1)
+    assert malam == datetime.datetime(2024, 3, 2, 0, 0, 2)
+    assert dini_hari == datetime.datetime(2024, 3, 1, 0, 0, 2)
+
+
+def test_batch_kosong():
+    assert get_shift_dates([]) == []
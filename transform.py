@@ -0,0 +1,137 @@
+import datetime
+
+# === Batas jam shift ===
+SHIFT_PAGI_MULAI = datetime.time(7, 0, 0)
+SHIFT_PAGI_SELESAI = datetime.time(18, 59, 59)
+SHIFT_MALAM_MULAI = datetime.time(19, 0, 0)
+SHIFT_MALAM_SELESAI = datetime.time(23, 59, 59)
+
+PENANDA_SHIFT_PAGI = datetime.time(0, 0, 1)
+PENANDA_SHIFT_MALAM = datetime.time(0, 0, 2)
+
+SATU_HARI = datetime.timedelta(days=1)
+
+
+def get_shift_date(dt):
+    """Mengembalikan tanggal shift berdasarkan jam kerja."""
+    if not dt:
+        return None
+    try:
+        trim_date = dt.date()
+        trim_time = dt.time()
+        if SHIFT_PAGI_MULAI <= trim_time <= SHIFT_PAGI_SELESAI:
+            return datetime.datetime.combine(trim_date, PENANDA_SHIFT_PAGI)
+        elif SHIFT_MALAM_MULAI <= trim_time <= SHIFT_MALAM_SELESAI:
+            return datetime.datetime.combine(trim_date, PENANDA_SHIFT_MALAM)
+        else:
+            return datetime.datetime.combine(trim_date - SATU_HARI, PENANDA_SHIFT_MALAM)
+    except Exception as e:
+        print("Error get_shift_date:", e)
+        return None
+
+
+def _shift_dates_for_day(day):
+    """Tiga kemungkinan tanggal shift untuk satu hari: (pagi, malam, dini hari)."""
+    return (
+        datetime.datetime.combine(day, PENANDA_SHIFT_PAGI),
+        datetime.datetime.combine(day, PENANDA_SHIFT_MALAM),
+        datetime.datetime.combine(day - SATU_HARI, PENANDA_SHIFT_MALAM),
+    )
+
+
+def get_shift_dates(values):
+    """Versi batch get_shift_date untuk satu chunk nilai TANGGAL2.
+
+    Hasil per hari dihitung sekali lalu dipakai ulang untuk semua baris di
+    hari yang sama; hasilnya identik dengan get_shift_date per baris.
+    """
+    per_hari = {}
+    hasil = []
+    for dt in values:
+        if not dt:
+            hasil.append(None)
+            continue
+        try:
+            trim_date = dt.date()
+            trim_time = dt.time()
+        except Exception:
+            # tipe tak terduga: serahkan ke versi per baris (ikut mencetak error)
+            hasil.append(get_shift_date(dt))
+            continue
+
+        shift = per_hari.get(trim_date)
+        if shift is None:
+            try:
+                shift = per_hari[trim_date] = _shift_dates_for_day(trim_date)
+            except Exception:
+                hasil.append(get_shift_date(dt))
+                continue
+
+        if SHIFT_PAGI_MULAI <= trim_time <= SHIFT_PAGI_SELESAI:
+            hasil.append(shift[0])
+        elif SHIFT_MALAM_MULAI <= trim_time <= SHIFT_MALAM_SELESAI:
+            hasil.append(shift[1])
+        else:
+            hasil.append(shift[2])
+    return hasil
+
+
+class RowBatch:
+    """Batch baris dengan satu indeks kolom untuk seluruh batch.
+
+    Baris sumber (tuple dari cursor) disimpan apa adanya, kolom buatan
+    disimpan terpisah per kolom. `rows` menggabungkan keduanya sekali saja
+    (satu tuple per baris) dengan urutan sama seperti `columns`, siap untuk
+    executemany. Seperti row.get, kolom yang tidak ada dibaca sebagai None.
+    """
+
+    def __init__(self, columns, rows):
+        self.columns = list(columns)
+        self.index = {c: i for i, c in enumerate(self.columns)}
+        self.source = rows
+        self.source_width = len(self.columns)
+        self.extra = []
+        self._rows = None
+
+    def __len__(self):
+        return len(self.source)
+
+    def column(self, name):
+        i = self.index.get(name)
+        if i is None:
+            return [None] * len(self.source)
+        if i < self.source_width:
+            return [r[i] for r in self.source]
+        values = self.extra[i - self.source_width]
+        if isinstance(values, list):
+            return list(values)
+        return [values[0]] * len(self.source)
+
+    def _add(self, name, values):
+        self.index[name] = len(self.columns)
+        self.columns.append(name)
+        self.extra.append(values)
+        self._rows = None
+
+    def add_column(self, name, values):
+        """Tambah kolom dari daftar nilai (satu per baris); baris sumber tidak disalin."""
+        self._add(name, list(values))
+
+    def add_constant(self, name, value):
+        # disimpan sebagai tuple satu nilai, dibedakan dari kolom per baris (list)
+        self._add(name, (value,))
+
+    @property
+    def rows(self):
+        if self._rows is None:
+            source = [r if isinstance(r, tuple) else tuple(r) for r in self.source]
+            if not self.extra:
+                self._rows = source
+            elif all(isinstance(v, tuple) for v in self.extra):
+                tail = tuple(v[0] for v in self.extra)
+                self._rows = [r + tail for r in source]
+            else:
+                n = len(source)
+                per_row = [v if isinstance(v, list) else [v[0]] * n for v in self.extra]
+                self._rows = [r + tail for r, tail in zip(source, zip(*per_row))]
+        return self._rows